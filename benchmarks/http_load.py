@@ -0,0 +1,326 @@
+"""
+HTTP load benchmark of the API under a mixed read/write workload.
+
+Generates a dataset with workly.generate (or reuses --database), starts the
+app under uvicorn on localhost and drives it from client threads with
+keep-alive connections. Reports throughput and p50/p95/p99 latency per
+route, writes them as JSON and compares them with a baseline written by an
+earlier run. Exits with status 1 when a route regressed beyond the
+tolerance.
+
+    python -m benchmarks.http_load --scale 0.01 --duration 30 --output results.json
+    python -m benchmarks.http_load --database bench.db --baseline results.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SEARCH_TERMS = ("engineer", "senior", "data", "designer", "remote", "python", "manager")
+
+# Operation name, route template and relative weight.
+WORKLOAD = (
+    ("search_jobs", "GET /jobs?q=", 20),
+    ("list_jobs", "GET /jobs", 10),
+    ("get_job", "GET /jobs/{job_id}", 15),
+    ("list_applications", "GET /applications?job_id=", 15),
+    ("get_application", "GET /applications/{application_id}", 10),
+    ("application_counts", "GET /jobs/{job_id}/applications/counts", 5),
+    ("create_application", "POST /applications", 10),
+    ("update_application", "PUT /applications/{application_id}", 7),
+    ("delete_application", "DELETE /applications/{application_id}", 3),
+    ("upsert_applicant", "PUT /applicants/upsert", 5),
+)
+
+
+class Client:
+    """
+    One worker's view of the dataset and its keep-alive connection.
+    """
+
+    def __init__(self, port: int, ids: dict, seed: int):
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        self.ids = ids
+        self.rng = random.Random(seed)
+        self.created: list[int] = []
+
+    def request(self, method: str, path: str, body=None) -> int:
+        headers = {}
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        self.connection.request(method, path, body, headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        if response.status == 201 and path == "/applications":
+            self.created.append(json.loads(data)["applicationId"])
+        return response.status
+
+    def pick(self, table: str) -> int:
+        return self.rng.randint(1, self.ids[table])
+
+    def search_jobs(self):
+        return self.request("GET", f"/jobs?q={self.rng.choice(SEARCH_TERMS)}&limit=20")
+
+    def list_jobs(self):
+        return self.request("GET", "/jobs?limit=20")
+
+    def get_job(self):
+        return self.request("GET", f"/jobs/{self.pick('jobs')}")
+
+    def list_applications(self):
+        return self.request("GET", f"/applications?job_id={self.pick('jobs')}&limit=20")
+
+    def get_application(self):
+        return self.request("GET", f"/applications/{self.pick('applications')}")
+
+    def application_counts(self):
+        return self.request("GET", f"/jobs/{self.pick('jobs')}/applications/counts")
+
+    def create_application(self):
+        return self.request(
+            "POST",
+            "/applications",
+            {
+                "coverLetter": "Benchmark",
+                "status": "pending",
+                "jobId": self.pick("jobs"),
+                "resumeId": self.pick("resumes"),
+            },
+        )
+
+    def update_application(self):
+        return self.request(
+            "PUT",
+            f"/applications/{self.pick('applications')}",
+            {
+                "coverLetter": "Benchmark",
+                "status": self.rng.choice(("pending", "accepted", "rejected")),
+            },
+        )
+
+    def delete_application(self):
+        if not self.created:
+            return self.create_application()
+        return self.request("DELETE", f"/applications/{self.created.pop()}")
+
+    def upsert_applicant(self):
+        n = self.rng.randint(1, 1000)
+        return self.request(
+            "PUT",
+            "/applicants/upsert",
+            {
+                "name": f"Bench {self.rng.randint(1, 3)}",
+                "email": f"bench{n}@example.com",
+            },
+        )
+
+
+def percentile(values: list[float], p: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
+
+
+def run_workload(
+    port: int,
+    ids: dict,
+    concurrency: int,
+    duration: float,
+    seed: int,
+    workload=WORKLOAD,
+):
+    names = [name for name, _, _ in workload]
+    weights = [weight for _, _, weight in workload]
+    samples = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(n):
+        client = Client(port, ids, seed + n)
+        local = {name: [] for name in names}
+        local_errors = {name: 0 for name in names}
+        while time.perf_counter() < deadline:
+            name = client.rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                status = getattr(client, name)()
+            except (OSError, http.client.HTTPException):
+                client.connection.close()
+                status = 599
+            elapsed = time.perf_counter() - started
+            if status >= 500:
+                local_errors[name] += 1
+            else:
+                local[name].append(elapsed)
+        with lock:
+            for name in names:
+                samples[name] += local[name]
+                errors[name] += local_errors[name]
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    routes = {}
+    for name, route, _ in workload:
+        latencies = samples[name]
+        routes[name] = {
+            "route": route,
+            "requests": len(latencies),
+            "errors": errors[name],
+            "throughput": len(latencies) / duration,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        }
+    total = sum(route["requests"] for route in routes.values())
+    return {"throughput": total / duration, "routes": routes}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Routes whose p95 latency grew or throughput dropped by more than
+    tolerance compared with the baseline.
+    """
+
+    regressions = []
+    for name, route in results["routes"].items():
+        before = baseline["routes"].get(name)
+        if before is None or not before["requests"]:
+            continue
+        if route["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {before['p95_ms']:.2f} ms -> {route['p95_ms']:.2f} ms"
+            )
+        if route["throughput"] < before["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {before['throughput']:.0f}/s -> "
+                f"{route['throughput']:.0f}/s"
+            )
+    return regressions
+
+
+def wait_until_ready(port: int, server: subprocess.Popen, timeout: float = 60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited before it was ready")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/healthcheck")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("uvicorn did not become ready")
+
+
+def dataset_ids(path: str) -> dict:
+    with sqlite3.connect(path) as connection:
+        return {
+            table: connection.execute(f"SELECT MAX(id) FROM {table}").fetchone()[0]
+            for table in ("jobs", "resumes", "applications")
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--database", help="SQLite file to use, generated if missing")
+    parser.add_argument("--scale", type=float, default=0.01)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="results JSON of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    path = args.database or os.path.join(tempfile.mkdtemp(), "bench.db")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{os.path.abspath(path)}",
+        "SQL_LOG_MODE": os.environ.get("SQL_LOG_MODE", "off"),
+    }
+    if not os.path.exists(path):
+        print(f"generating scale {args.scale} dataset in {path}", file=sys.stderr)
+        subprocess.run(
+            [sys.executable, "-m", "workly.generate", "--scale", str(args.scale)],
+            env=env,
+            check=True,
+        )
+
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "workly.main:app",
+            "--port",
+            str(args.port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+    try:
+        wait_until_ready(args.port, server)
+        ids = dataset_ids(path)
+        if args.warmup:
+            run_workload(args.port, ids, args.concurrency, args.warmup, args.seed)
+        results = run_workload(
+            args.port, ids, args.concurrency, args.duration, args.seed
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+    results["config"] = {
+        "database": path,
+        "rows": ids,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "seed": args.seed,
+    }
+
+    print(
+        f"{'route':<42} {'req/s':>8} {'errors':>7} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for route in results["routes"].values():
+        print(
+            f"{route['route']:<42} {route['throughput']:>8.1f} {route['errors']:>7} "
+            f"{route['p50_ms']:>8.2f} {route['p95_ms']:>8.2f} {route['p99_ms']:>8.2f}"
+        )
+    print(f"{'total':<42} {results['throughput']:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Serialization cost of list responses, per route.
+
+Loads one page of each list route from a generated dataset and encodes it
+both the way FastAPI does for a response_model (validate into the pydantic
+models, jsonable_encoder, json.dumps) and with workly.serializers (compiled
+dict builders and orjson). Fails if the two outputs differ by a byte.
+
+    python -m benchmarks.serialization --limit 100
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from workly import cache, crud, models, schema, serializers, storage
+from workly.generate import generate
+
+# Route, response model and the page it returns. Nested pages are read for
+# the parent with the most children.
+PAGES = {
+    "GET /employers": (schema.Employer, crud.get_employers),
+    "GET /jobs": (schema.Job, crud.get_jobs),
+    "GET /applicants": (schema.Applicant, crud.get_applicants),
+    "GET /resumes": (
+        schema.Resume,
+        lambda db, limit: crud.get_resumes(
+            db, busiest(db, models.Resume.applicant_id), limit=limit
+        ),
+    ),
+    "GET /applications": (
+        schema.Application,
+        lambda db, limit: crud.get_applications(
+            db, busiest(db, models.Application.job_id), limit=limit
+        ),
+    ),
+    "GET /notifications": (schema.Notification, crud.get_notifications),
+}
+
+
+def busiest(db, column) -> int:
+    return db.execute(
+        select(column).group_by(column).order_by(func.count().desc()).limit(1)
+    ).scalar()
+
+
+def fastapi_path(loop, field, items) -> bytes:
+    content = loop.run_until_complete(
+        serialize_response(field=field, response_content=items)
+    )
+    return JSONResponse(content).body
+
+
+def fast_path(model, items) -> bytes:
+    return serializers.dumps(model, items)
+
+
+def measure(encode, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encode()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--scale", type=float, default=0.001)
+    parser.add_argument("--limit", type=int, default=100, help="rows per page")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}
+    )
+    event.listen(
+        engine,
+        "connect",
+        lambda dbapi_connection, _: storage.configure_connection(dbapi_connection),
+    )
+    models.Base.metadata.create_all(bind=engine)
+    cache.set_backend(cache.NullCache())
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    loop = asyncio.new_event_loop()
+    results = []
+    mismatches = []
+    with Session() as db:
+        for _ in generate(db, scale=args.scale):
+            pass
+        db.execute(
+            models.Notification.__table__.insert(),
+            [
+                {"message": f"A new job was posted: {job.title}", "job_id": job.id}
+                for job in crud.get_jobs(db, limit=args.limit)
+            ],
+        )
+        db.commit()
+        for route, (model, page) in PAGES.items():
+            items = page(db, limit=args.limit)
+            field = create_response_field(f"Response_{model.__name__}", list[model])
+            if fastapi_path(loop, field, items) != fast_path(model, items):
+                mismatches.append(route)
+            results.append(
+                (
+                    route,
+                    len(items),
+                    measure(lambda: fastapi_path(loop, field, items), args.repeat),
+                    measure(lambda: fast_path(model, items), args.repeat),
+                )
+            )
+    loop.close()
+    engine.dispose()
+
+    print(f"{'route':<20} {'rows':>5} {'fastapi ms':>11} {'fast ms':>8} {'speedup':>8}")
+    for route, rows, slow, fast in results:
+        print(f"{route:<20} {rows:>5} {slow:>11.3f} {fast:>8.3f} {slow / fast:>7.1f}x")
+    for route in mismatches:
+        print(f"{route}: outputs differ", file=sys.stderr)
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Read/write throughput of each SQLite storage profile.
+
+Every profile gets a fresh database file in the target directory, which
+defaults to the Fly volume mount (/data/workly_db) when it exists. Writer
+threads insert one employer per transaction, like the API does, while reader
+threads look employers up by primary key.
+
+    python -m benchmarks.sqlite_profiles --readers 4 --writers 2 --duration 10
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, event, insert, select
+
+from workly import models, storage
+
+FLY_VOLUME = "/data/workly_db"
+
+
+def run_profile(directory: str, profile: str, readers: int, writers: int, duration):
+    path = os.path.join(directory, f"bench-{profile}.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+        pool_size=readers + writers,
+    )
+    event.listen(
+        engine,
+        "connect",
+        lambda dbapi_connection, _: storage.configure_connection(
+            dbapi_connection, profile
+        ),
+    )
+    models.Base.metadata.create_all(bind=engine)
+
+    employers = models.Employer.__table__
+    with engine.begin() as connection:
+        connection.execute(
+            insert(employers),
+            [
+                {"name": f"Seed {i}", "email": f"seed{i}@example.com"}
+                for i in range(1000)
+            ],
+        )
+
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def count(key):
+        with lock:
+            counts[key] += 1
+
+    def reader():
+        with engine.connect() as connection:
+            while time.perf_counter() < deadline:
+                employer_id = random.randint(1, 1000)
+                connection.execute(
+                    select(employers).where(employers.c.id == employer_id)
+                ).first()
+                connection.rollback()
+                count("reads")
+
+    def writer(n):
+        i = 0
+        while time.perf_counter() < deadline:
+            try:
+                with engine.begin() as connection:
+                    connection.execute(
+                        insert(employers),
+                        {"name": "Bench", "email": f"w{n}-{i}@example.com"},
+                    )
+                count("writes")
+            except Exception:
+                count("errors")
+            i += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return {key: value / duration for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dir", default=None, help="directory for the database files")
+    parser.add_argument("--profiles", nargs="+", default=list(storage.PROFILES))
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    directory = args.dir
+    if directory is None:
+        directory = FLY_VOLUME if os.path.isdir(FLY_VOLUME) else tempfile.mkdtemp()
+
+    print(f"directory: {directory}")
+    print(f"{'profile':<10} {'reads/s':>10} {'writes/s':>10} {'errors/s':>10}")
+    for profile in args.profiles:
+        result = run_profile(
+            directory, profile, args.readers, args.writers, args.duration
+        )
+        print(
+            f"{profile:<10} {result['reads']:>10.0f} {result['writes']:>10.0f} "
+            f"{result['errors']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
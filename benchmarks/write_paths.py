@@ -0,0 +1,203 @@
+"""
+Statements and latency of the update and delete paths, per entity.
+
+Compares the ORM path the routes used to take (look the row up for the 404,
+select it again, mutate, commit and refresh) with the single UPDATE/DELETE
+... RETURNING statement in crud. The entity cache is disabled so every
+lookup reaches the database.
+
+    python -m benchmarks.write_paths --rows 500
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from workly import cache, crud, models, schema, storage
+
+ENTITIES = {
+    "employer": (
+        models.Employer,
+        crud.get_employer,
+        crud.update_employer,
+        crud.delete_employer,
+        lambda i: schema.EmployerUpdate(name=f"E{i}", email=f"e{i}@example.com"),
+    ),
+    "job": (
+        models.Job,
+        crud.get_job,
+        crud.update_job,
+        crud.delete_job,
+        lambda i: schema.JobUpdate(
+            title=f"J{i}", description="d", location="L", salary=1, status="closed"
+        ),
+    ),
+    "applicant": (
+        models.Applicant,
+        crud.get_applicant,
+        crud.update_applicant,
+        crud.delete_applicant,
+        lambda i: schema.ApplicantUpdate(name=f"A{i}", email=f"a{i}@example.com"),
+    ),
+    "resume": (
+        models.Resume,
+        crud.get_resume,
+        crud.update_resume,
+        crud.delete_resume,
+        lambda i: schema.ResumeUpdate(resume=f"R{i}"),
+    ),
+    "application": (
+        models.Application,
+        crud.get_application,
+        crud.update_application,
+        crud.delete_application,
+        lambda i: schema.ApplicationUpdate(coverLetter="c", status="accepted"),
+    ),
+}
+
+# Children before parents, so deletes do not measure cascades.
+DELETE_ORDER = ("application", "resume", "job", "applicant", "employer")
+
+
+def orm_update(db, model, get, id, values):
+    get(db, id)
+    obj = db.query(model).filter(model.id == id).first()
+    for key, value in values.dict(exclude={"cover_letter"}).items():
+        setattr(obj, key, value)
+    db.commit()
+    db.refresh(obj)
+
+
+def orm_delete(db, model, get, id):
+    get(db, id)
+    obj = db.query(model).filter(model.id == id).first()
+    db.delete(obj)
+    db.commit()
+
+
+def seed(engine, rows: int):
+    def table(model, make):
+        return insert(model.__table__), [make(i) for i in range(1, rows + 1)]
+
+    with engine.begin() as connection:
+        for statement, values in (
+            table(models.Employer, lambda i: {"name": "E", "email": f"e{i}@x.com"}),
+            table(
+                models.Job,
+                lambda i: {
+                    "title": "J",
+                    "description": "d",
+                    "location": "L",
+                    "salary": 1,
+                    "status": "OPEN",
+                    "employer_id": i,
+                },
+            ),
+            table(models.Applicant, lambda i: {"name": "A", "email": f"a{i}@x.com"}),
+            table(models.Resume, lambda i: {"resume": "R", "applicant_id": i}),
+            table(
+                models.Application,
+                lambda i: {
+                    "cover_letter": "c",
+                    "status": "PENDING",
+                    "job_id": i,
+                    "resume_id": i,
+                },
+            ),
+        ):
+            connection.execute(statement, values)
+
+
+def measure(engine, operation, ids):
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    timings = []
+    try:
+        for id in ids:
+            started = time.perf_counter()
+            operation(id)
+            timings.append(time.perf_counter() - started)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return {
+        "statements": statements / len(ids),
+        "mean_ms": statistics.mean(timings) * 1000,
+        "p95_ms": statistics.quantiles(timings, n=20)[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=500, help="rows per strategy")
+    parser.add_argument("--profile", default="balanced", choices=storage.PROFILES)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}
+    )
+    event.listen(
+        engine,
+        "connect",
+        lambda dbapi_connection, _: storage.configure_connection(
+            dbapi_connection, args.profile
+        ),
+    )
+    models.Base.metadata.create_all(bind=engine)
+    seed(engine, args.rows * 2)
+    cache.set_backend(cache.NullCache())
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    orm_ids = range(1, args.rows + 1)
+    returning_ids = range(args.rows + 1, args.rows * 2 + 1)
+    results = []
+    with Session() as db:
+        for name, (model, get, update, _, values) in ENTITIES.items():
+            results.append(
+                (
+                    f"update {name}",
+                    measure(
+                        engine,
+                        lambda id: orm_update(db, model, get, id, values(id)),
+                        orm_ids,
+                    ),
+                    measure(
+                        engine, lambda id: update(db, values(id), id), returning_ids
+                    ),
+                )
+            )
+        for name in DELETE_ORDER:
+            model, get, _, delete, _ = ENTITIES[name]
+            results.append(
+                (
+                    f"delete {name}",
+                    measure(engine, lambda id: orm_delete(db, model, get, id), orm_ids),
+                    measure(engine, lambda id: delete(db, id), returning_ids),
+                )
+            )
+    engine.dispose()
+
+    print(
+        f"{'operation':<20} {'orm stmts':>10} {'orm ms':>8} {'orm p95':>8} "
+        f"{'ret stmts':>10} {'ret ms':>8} {'ret p95':>8}"
+    )
+    for operation, orm, returning in results:
+        print(
+            f"{operation:<20} {orm['statements']:>10.1f} {orm['mean_ms']:>8.3f} "
+            f"{orm['p95_ms']:>8.3f} {returning['statements']:>10.1f} "
+            f"{returning['mean_ms']:>8.3f} {returning['p95_ms']:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
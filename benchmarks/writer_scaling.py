@@ -0,0 +1,122 @@
+"""
+Write throughput from 1 to N uvicorn workers, with and without the writer.
+
+For every worker count, starts the app on a copy of a generated dataset
+either with plain uvicorn --workers (every worker commits on its own) or
+with python -m workly.writer (every write goes through the single writer)
+and drives it with a write-only workload of application creates and updates.
+Reports writes per second, p95 latency and failed requests, which in the
+plain mode are mostly writes that gave up waiting for the database lock.
+
+    python -m benchmarks.writer_scaling --max-workers 4 --duration 10
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.http_load import dataset_ids, run_workload, wait_until_ready
+
+WORKLOAD = (
+    ("create_application", "POST /applications", 2),
+    ("update_application", "PUT /applications/{application_id}", 1),
+)
+
+
+def serve(mode: str, workers: int, port: int, env: dict, directory: str):
+    if mode == "writer":
+        command = [
+            "-m",
+            "workly.writer",
+            "--address",
+            os.path.join(directory, "writer.sock"),
+        ]
+    else:
+        command = ["-m", "uvicorn", "workly.main:app"]
+    return subprocess.Popen(
+        [
+            sys.executable,
+            *command,
+            "--workers",
+            str(workers),
+            "--port",
+            str(port),
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def measure(mode: str, workers: int, dataset: str, args) -> dict:
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "bench.db")
+    shutil.copy(dataset, path)
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{path}",
+        "SQL_LOG_MODE": "off",
+    }
+    server = serve(mode, workers, args.port, env, directory)
+    try:
+        wait_until_ready(args.port, server)
+        ids = dataset_ids(path)
+        results = run_workload(
+            args.port, ids, args.concurrency, args.duration, args.seed, WORKLOAD
+        )
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(directory)
+    latencies = [route["p95_ms"] for route in results["routes"].values()]
+    return {
+        "throughput": results["throughput"],
+        "p95_ms": max(latencies),
+        "errors": sum(route["errors"] for route in results["routes"].values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--scale", type=float, default=0.001)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--modes", default="uvicorn,writer", help="comma-separated: uvicorn, writer"
+    )
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    dataset = os.path.join(directory, "dataset.db")
+    print(f"generating scale {args.scale} dataset", file=sys.stderr)
+    subprocess.run(
+        [sys.executable, "-m", "workly.generate", "--scale", str(args.scale)],
+        env={
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{dataset}",
+            "SQL_LOG_MODE": "off",
+        },
+        check=True,
+    )
+
+    print(f"{'mode':<8} {'workers':>7} {'writes/s':>9} {'p95 ms':>8} {'errors':>7}")
+    try:
+        for mode in args.modes.split(","):
+            for workers in range(1, args.max_workers + 1):
+                result = measure(mode, workers, dataset, args)
+                print(
+                    f"{mode:<8} {workers:>7} {result['throughput']:>9.1f} "
+                    f"{result['p95_ms']:>8.2f} {result['errors']:>7}"
+                )
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+# The engines are created when workly is imported, the configuration has to be
+# in place before. Reads go to two replica files refreshed only by the tests.
+directory = tempfile.mkdtemp(prefix="workly-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(directory, 'workly.db')}",
+    DATABASE_REPLICA_URLS=",".join(
+        f"sqlite:///{os.path.join(directory, name)}"
+        for name in ("replica1.db", "replica2.db")
+    ),
+    REPLICA_REFRESH_INTERVAL="0",
+    SQLITE_MAINTENANCE_INTERVAL="0",
+    NOTIFICATION_POLL_INTERVAL="3600",
+    SQL_LOG_MODE="off",
+    SQL_LOG_FILE=os.path.join(directory, "sql.log"),
+)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from workly import cache, main, replication  # noqa: E402
+from workly.main import app  # noqa: E402
+
+
+async def stop_background_tasks():
+    # The notification feed and the other loops query the database at any
+    # time, the tests count the statements of their requests.
+    for task in app.state.tasks:
+        task.cancel()
+    await asyncio.gather(*app.state.tasks, return_exceptions=True)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        client.portal.call(stop_background_tasks)
+        yield client
+
+
+@pytest.fixture
+def primary_client(client, monkeypatch):
+    """
+    The client as in a deployment without replicas: reads are served by the
+    primary and go through the entity cache.
+    """
+
+    monkeypatch.setattr(main, "ReplicaSessionLocals", [])
+    monkeypatch.setattr(replication, "replica_engines", [])
+    cache.backend.clear()
+    yield client
+    cache.backend.clear()
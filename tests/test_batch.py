@@ -0,0 +1,29 @@
+from workly import replication
+
+
+def job(title: str, employer_id: int = 1) -> dict:
+    return {
+        "title": title,
+        "description": "Batch",
+        "location": "Remote",
+        "salary": 1,
+        "status": "open",
+        "employerId": employer_id,
+    }
+
+
+def test_ids_match_their_rows(client):
+    items = [job(f"Batch {i % 3}") for i in range(6)]
+    items[4] = job("Missing employer", employer_id=10**9)
+    response = client.post("/jobs/batch", json=items)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["index"] for result in results] == list(range(6))
+    assert results[4]["id"] is None and results[4]["error"]
+    assert response.json()["created"] == 5
+
+    replication.refresh_replicas()
+    for item, result in zip(items, results):
+        if result["id"] is not None:
+            created = client.get(f"/jobs/{result['id']}").json()
+            assert created["title"] == item["title"]
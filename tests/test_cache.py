@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import update
+
+from workly import cache, database, models
+
+
+def test_backend_missing_a_method_fails_on_creation():
+    class Partial(cache.CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+    cache.MemoryCache()
+    cache.NullCache()
+
+
+JOB = {
+    "title": "Cached",
+    "description": "A cached job",
+    "location": "Remote",
+    "salary": 1,
+    "status": "open",
+    "employerId": 2,
+}
+
+
+def hits() -> int:
+    return cache.backend.stats()["hits"]
+
+
+def test_lookups_are_cached(primary_client):
+    job = primary_client.post("/jobs", json=JOB).json()
+    before = hits()
+    assert primary_client.get(f"/jobs/{job['jobId']}").json() == job
+    assert hits() == before + 1
+
+
+def test_update_invalidates_the_row_and_its_embeddings(primary_client):
+    job = primary_client.post("/jobs", json=JOB).json()
+    primary_client.get(f"/jobs/{job['jobId']}")
+
+    response = primary_client.put(
+        f"/jobs/{job['jobId']}", json={**JOB, "title": "Updated"}
+    )
+    assert response.status_code == 200
+    assert primary_client.get(f"/jobs/{job['jobId']}").json()["title"] == "Updated"
+
+    employer = primary_client.get("/employers/2").json()
+    response = primary_client.put(
+        "/employers/2",
+        json={"name": "Renamed", "email": employer["email"], "phone": "1"},
+    )
+    assert response.status_code == 200
+    job = primary_client.get(f"/jobs/{job['jobId']}").json()
+    assert job["employer"]["name"] == "Renamed"
+
+
+def test_delete_invalidates_the_row_and_its_dependents(primary_client):
+    job = primary_client.post("/jobs", json=JOB).json()
+    application = primary_client.post(
+        "/applications",
+        json={
+            "coverLetter": "Cover letter",
+            "status": "pending",
+            "jobId": job["jobId"],
+            "resumeId": 1,
+        },
+    ).json()
+    url = f"/applications/{application['applicationId']}"
+    assert primary_client.get(url).status_code == 200
+    assert primary_client.get(f"/jobs/{job['jobId']}").status_code == 200
+
+    # The application goes with the job, deleted by a Core statement.
+    assert primary_client.delete(f"/jobs/{job['jobId']}").status_code == 204
+    assert primary_client.get(f"/jobs/{job['jobId']}").status_code == 404
+    assert primary_client.get(url).status_code == 404
+
+
+def test_rollback_keeps_the_cached_rows(primary_client):
+    primary_client.get("/jobs/2")
+    with database.SessionLocal() as db:
+        db.execute(update(models.Job).where(models.Job.id == 2).values(salary=2))
+        cache.invalidate_on_commit(db, ("jobs", 2))
+        db.rollback()
+        db.commit()
+    before = hits()
+    primary_client.get("/jobs/2")
+    assert hits() == before + 1
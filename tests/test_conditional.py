@@ -0,0 +1,41 @@
+import os
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from workly import conditional
+
+
+@pytest.fixture
+def local_timezone():
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "EST+05"
+    time.tzset()
+    yield
+    if previous is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = previous
+    time.tzset()
+
+
+def test_local_timestamps_are_converted_to_utc(local_timezone):
+    assert (
+        conditional.http_date(datetime(2024, 1, 1, 12, 0, 0, 500))
+        == "Mon, 01 Jan 2024 17:00:00 GMT"
+    )
+
+
+def test_last_modified_is_utc(client, local_timezone):
+    response = client.get("/employers/1")
+    updated_at = datetime.fromisoformat(response.json()["updatedAt"])
+    last_modified = updated_at.replace(microsecond=0).astimezone(timezone.utc)
+    assert response.headers["Last-Modified"] == format_datetime(last_modified, True)
+
+    response = client.get(
+        "/employers/1",
+        headers={"If-Modified-Since": response.headers["Last-Modified"]},
+    )
+    assert response.status_code == 304
@@ -0,0 +1,19 @@
+import asyncio
+
+from workly import notifications
+
+
+def test_replay_pages_through_the_backlog(client, monkeypatch):
+    backlog = notifications.fetch_after(0, limit=10**6)
+    assert len(backlog) > 2
+    monkeypatch.setattr(notifications, "NOTIFICATION_BACKLOG_LIMIT", 2)
+
+    async def replay():
+        subscription = notifications.Subscription(notifications.feed)
+        events = []
+        async for event in subscription.events(last_id=0, keepalive=0.01):
+            if event is None:
+                return events
+            events.append(event)
+
+    assert asyncio.run(replay()) == backlog
@@ -0,0 +1,36 @@
+from sqlalchemy import func, select
+from sqlalchemy.sql import text
+
+from workly import database, migrations, models, replication
+
+
+def test_pages_end_with_legacy_timestamps(client):
+    # Notifications written by the first version of the job trigger store
+    # their timestamps without a fraction.
+    with database.SessionLocal() as db:
+        for i in range(3):
+            db.execute(
+                text(
+                    "INSERT INTO notifications (message, job_id, created_at, updated_at) "
+                    "VALUES (:message, 1, datetime('now'), datetime('now'))"
+                ),
+                {"message": f"Legacy {i}"},
+            )
+        db.execute(text("DELETE FROM schema_migrations WHERE version >= 2"))
+        db.commit()
+        migrations.migrate(db)
+        total = db.scalar(select(func.count(models.Notification.id)))
+    replication.refresh_replicas()
+
+    messages = []
+    params = {"limit": 2}
+    for _ in range(total):
+        response = client.get("/notifications", params=params)
+        assert response.status_code == 200
+        messages.extend(notification["message"] for notification in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params["cursor"] = cursor
+    assert len(messages) == total
+    assert {f"Legacy {i}" for i in range(3)} <= set(messages)
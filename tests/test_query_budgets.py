@@ -0,0 +1,71 @@
+import pytest
+
+from workly import profiler, replication
+
+# Read requests checked against the budget of the route they match.
+URLS = [
+    "/employers",
+    "/employers/1",
+    "/jobs",
+    "/jobs?title=engineer",
+    "/jobs?q=software",
+    "/jobs/1",
+    "/applicants",
+    "/applicants/1",
+    "/resumes?applicant_id=1",
+    "/resumes/1",
+    "/applications?job_id=1",
+    "/applications/1",
+    "/notifications",
+    "/jobs/1/applications/counts",
+    "/employers/1/applications/counts",
+]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def applications(client):
+    # Applications to job 1 from several applicants, so a page holds nested
+    # objects that are not all the same row.
+    for i in range(3):
+        applicant = client.post(
+            "/applicants",
+            json={"name": f"N+1 {i}", "email": f"n{i}@example.com", "phone": "1"},
+        ).json()
+        resume = client.post(
+            "/resumes", json={"resume": "Resume", "applicantId": applicant["applicantId"]}
+        ).json()
+        client.post(
+            "/applications",
+            json={
+                "coverLetter": "Cover letter",
+                "status": "pending",
+                "jobId": 1,
+                "resumeId": resume["resumeId"],
+            },
+        )
+    replication.refresh_replicas()
+
+
+@pytest.mark.parametrize("url", URLS)
+def test_read_within_budget(client, url):
+    response = profiler.assert_within_budget(client, "GET", url)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("url", ["/jobs", "/applications?job_id=1", "/notifications"])
+def test_statements_do_not_grow_with_the_page(client, url):
+    separator = "&" if "?" in url else "?"
+    with profiler.query_budget(profiler.SQL_QUERY_BUDGET) as statements:
+        response = client.get(f"{url}{separator}limit=1")
+    assert len(response.json()) == 1
+    one = len(statements)
+    with profiler.query_budget(profiler.SQL_QUERY_BUDGET) as statements:
+        response = client.get(url)
+    assert len(response.json()) > 1
+    assert len(statements) == one
+
+
+def test_over_budget_fails(client):
+    with pytest.raises(AssertionError, match="budget 1"):
+        with profiler.query_budget(1):
+            client.get("/jobs")
@@ -0,0 +1,270 @@
+"""
+Query plan checks for the crud queries.
+
+Runs every crud function against a scratch SQLite database with the current
+schema and migrations, asks SQLite for the plan of every statement with
+EXPLAIN QUERY PLAN and fails on statements that scan a whole table or sort
+through a temporary B-tree.
+"""
+
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from workly import cache, counters, crud, migrations, models, schema, storage
+from workly.pagination import Cursor
+from workly.search import create_search_index
+from workly.seed import seed_database
+from workly.triggers import create_triggers, create_version_triggers
+
+# Plan details that do not visit every row of a table.
+INDEXED_SCANS = ("USING INDEX", "USING COVERING INDEX", "VIRTUAL TABLE", "CONSTANT ROW")
+
+LAST_PAGE = Cursor(datetime(2000, 1, 1), 1)
+FIRST_PAGE = Cursor(datetime(2100, 1, 1), 10**9)
+
+
+def _contact(name: str):
+    return {"name": name, "email": f"{name.lower()}@plans.example.com"}
+
+
+# Full text matches come out of the FTS index in rowid order, ordering them by
+# rank or date needs a sort of the matching rows.
+FTS_SORT = ("USE TEMP B-TREE FOR ORDER BY",)
+
+# Name of the check, the call and the problems it may report.
+SCENARIOS = (
+    ("get_employer", lambda db: crud.get_employer(db, 1), ()),
+    ("get_employer_by_email", lambda db: crud.get_employer_by_email(db, "x"), ()),
+    ("get_employers", lambda db: crud.get_employers(db), ()),
+    ("get_employers cursor", lambda db: crud.get_employers(db, cursor=LAST_PAGE), ()),
+    (
+        "create_employer",
+        lambda db: crud.create_employer(db, schema.EmployerCreate(**_contact("E"))),
+        (),
+    ),
+    (
+        "upsert_employer",
+        lambda db: crud.upsert_employer(db, schema.EmployerCreate(**_contact("E"))),
+        (),
+    ),
+    (
+        "update_employer",
+        lambda db: crud.update_employer(db, schema.EmployerUpdate(**_contact("U")), 1),
+        (),
+    ),
+    ("get_job", lambda db: crud.get_job(db, 1), ()),
+    ("get_jobs", lambda db: crud.get_jobs(db), ()),
+    ("get_jobs cursor", lambda db: crud.get_jobs(db, cursor=FIRST_PAGE), ()),
+    ("get_jobs title", lambda db: crud.get_jobs(db, title="designer"), FTS_SORT),
+    ("get_jobs query", lambda db: crud.get_jobs(db, query="designer"), FTS_SORT),
+    (
+        "get_jobs query cursor",
+        lambda db: crud.get_jobs(db, query="designer", cursor=FIRST_PAGE),
+        FTS_SORT,
+    ),
+    (
+        "create_employer_job",
+        lambda db: crud.create_employer_job(
+            db,
+            schema.JobCreate(
+                title="T",
+                description="D",
+                location="L",
+                salary=1,
+                status=models.JobStatus.OPEN,
+                employerId=1,
+            ),
+        ),
+        (),
+    ),
+    (
+        "update_job",
+        lambda db: crud.update_job(
+            db,
+            schema.JobUpdate(
+                title="T",
+                description="D",
+                location="L",
+                salary=1,
+                status=models.JobStatus.CLOSED,
+            ),
+            1,
+        ),
+        (),
+    ),
+    ("get_applicant", lambda db: crud.get_applicant(db, 1), ()),
+    ("get_applicant_by_email", lambda db: crud.get_applicant_by_email(db, "x"), ()),
+    ("get_applicants", lambda db: crud.get_applicants(db), ()),
+    (
+        "get_applicants cursor",
+        lambda db: crud.get_applicants(db, cursor=LAST_PAGE),
+        (),
+    ),
+    (
+        "create_applicant",
+        lambda db: crud.create_applicant(db, schema.ApplicantCreate(**_contact("A"))),
+        (),
+    ),
+    (
+        "upsert_applicant",
+        lambda db: crud.upsert_applicant(db, schema.ApplicantCreate(**_contact("A"))),
+        (),
+    ),
+    (
+        "update_applicant",
+        lambda db: crud.update_applicant(
+            db, schema.ApplicantUpdate(**_contact("V")), 1
+        ),
+        (),
+    ),
+    ("get_resume", lambda db: crud.get_resume(db, 1), ()),
+    ("get_resumes", lambda db: crud.get_resumes(db, 1), ()),
+    ("get_resumes cursor", lambda db: crud.get_resumes(db, 1, cursor=LAST_PAGE), ()),
+    (
+        "create_applicant_resume",
+        lambda db: crud.create_applicant_resume(
+            db, schema.ResumeCreate(resume="R", applicantId=1)
+        ),
+        (),
+    ),
+    (
+        "update_resume",
+        lambda db: crud.update_resume(db, schema.ResumeUpdate(resume="R"), 1),
+        (),
+    ),
+    ("get_application", lambda db: crud.get_application(db, 1), ()),
+    ("get_applications", lambda db: crud.get_applications(db, 1), ()),
+    (
+        "get_applications cursor",
+        lambda db: crud.get_applications(db, 1, cursor=FIRST_PAGE),
+        (),
+    ),
+    (
+        "create_application",
+        lambda db: crud.create_application(
+            db,
+            schema.ApplicationCreate(
+                coverLetter="C",
+                status=models.ApplicationStatus.PENDING,
+                jobId=1,
+                resumeId=1,
+            ),
+        ),
+        (),
+    ),
+    (
+        "update_application",
+        lambda db: crud.update_application(
+            db,
+            schema.ApplicationUpdate(
+                coverLetter="C", status=models.ApplicationStatus.ACCEPTED
+            ),
+            1,
+        ),
+        (),
+    ),
+    ("get_notifications", lambda db: crud.get_notifications(db), ()),
+    (
+        "get_notifications cursor",
+        lambda db: crud.get_notifications(db, cursor=FIRST_PAGE),
+        (),
+    ),
+    ("delete_application", lambda db: crud.delete_application(db, 1), ()),
+    ("delete_resume", lambda db: crud.delete_resume(db, 2), ()),
+    ("delete_job", lambda db: crud.delete_job(db, 2), ()),
+    ("delete_applicant", lambda db: crud.delete_applicant(db, 3), ()),
+    ("delete_employer", lambda db: crud.delete_employer(db, 3), ()),
+)
+
+
+def problems(plan: list[str]) -> list[str]:
+    found = []
+    for detail in plan:
+        if detail.startswith("SCAN ") and not any(
+            scan in detail for scan in INDEXED_SCANS
+        ):
+            found.append(detail)
+        if detail.startswith("USE TEMP B-TREE"):
+            found.append(detail)
+    return found
+
+
+@pytest.fixture(scope="module")
+def session_factory(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("plans")
+    engine = create_engine(
+        f"sqlite:///{os.path.join(directory, 'plans.db')}",
+        connect_args={"check_same_thread": False},
+    )
+    event.listen(
+        engine,
+        "connect",
+        lambda dbapi_connection, _: storage.configure_connection(dbapi_connection),
+    )
+    models.Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with session_factory() as db:
+        migrations.migrate(db)
+        create_triggers(db)
+        create_version_triggers(db)
+        create_search_index(db)
+        counters.create_counters(db)
+        seed_database(db)
+    yield session_factory
+    engine.dispose()
+
+
+@pytest.fixture
+def plans(session_factory, monkeypatch):
+    """
+    The statements executed on the scratch database and their plans. The
+    entity cache is bypassed so lookups reach the database.
+    """
+
+    engine = session_factory.kw["bind"]
+    plans = []
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            return
+        explain_cursor = cursor.connection.cursor()
+        try:
+            rows = explain_cursor.execute(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            ).fetchall()
+        finally:
+            explain_cursor.close()
+        plans.append((statement, [row[3] for row in rows]))
+
+    monkeypatch.setattr(cache, "backend", cache.NullCache())
+    event.listen(engine, "before_cursor_execute", explain)
+    yield plans
+    event.remove(engine, "before_cursor_execute", explain)
+
+
+@pytest.mark.parametrize(
+    "scenario, allowed",
+    [scenario[1:] for scenario in SCENARIOS],
+    ids=[scenario[0] for scenario in SCENARIOS],
+)
+def test_query_plan(session_factory, plans, scenario, allowed):
+    with session_factory() as db:
+        scenario(db)
+    assert plans
+    failures = []
+    for statement, plan in plans:
+        found = [
+            problem
+            for problem in problems(plan)
+            if not any(problem.startswith(allow) for allow in allowed)
+        ]
+        if found:
+            failures.append(
+                f"{', '.join(found)}\n  {' '.join(statement.split())}\n"
+                + "\n".join(f"    {detail}" for detail in plan)
+            )
+    assert not failures, "\n".join(failures)
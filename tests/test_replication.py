@@ -0,0 +1,47 @@
+from workly import replication
+
+JOB = {
+    "title": "Architect",
+    "description": "An architect",
+    "location": "San Francisco, CA",
+    "salary": 120000,
+    "status": "open",
+}
+
+
+def test_read_your_writes(client):
+    replication.refresh_replicas()
+    assert client.get("/jobs/1").json()["title"] == "Designer"
+
+    response = client.put("/jobs/1", json=JOB)
+    assert response.status_code == 200
+    token = response.headers[replication.COMMIT_TOKEN_HEADER]
+
+    # Without the token the replicas serve the row as it was before the write.
+    assert client.get("/jobs/1").json()["title"] == "Designer"
+
+    headers = {replication.COMMIT_TOKEN_HEADER: token}
+    response = client.get("/jobs/1", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["title"] == "Architect"
+    assert [job["title"] for job in client.get("/jobs", headers=headers).json()].count(
+        "Architect"
+    ) == 1
+
+    etag = response.headers["ETag"]
+    response = client.get("/jobs/1", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    replication.refresh_replicas()
+    response = client.get("/jobs/1")
+    assert response.json()["title"] == "Architect"
+    assert response.headers["ETag"] == etag
+
+
+
+def test_refresh_skips_unchanged_primary(client):
+    replication.refresh_replicas()
+    assert not replication.refresh_replicas()
+    client.put("/jobs/3", json={**JOB, "title": "Refreshed"})
+    assert replication.refresh_replicas()
+    assert client.get("/jobs/3").json()["title"] == "Refreshed"
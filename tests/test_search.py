@@ -0,0 +1,37 @@
+import pytest
+
+from workly import database, main, models, profiler, search, writer
+
+
+def titles(client, **params) -> list[str]:
+    response = client.get("/jobs", params=params)
+    assert response.status_code == 200
+    return sorted(job["title"] for job in response.json())
+
+
+def test_words_match_by_prefix(client):
+    assert search.is_enabled()
+    assert "Software Engineer" in titles(client, title="engin")
+    assert "Software Engineer" in titles(client, title="soft eng")
+    assert "Software Engineer" not in titles(client, title="gineer")
+    assert titles(client, q="engineer menlo") == ["Software Engineer"]
+
+
+def test_writer_mode_workers_search_through_the_index(client, monkeypatch):
+    def create_all(*args, **kwargs):
+        pytest.fail("Workers must not create the schema")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(writer, "WRITER_ADDRESS", "/nonexistent/writer.sock")
+        patch.setattr(writer, "_serving", False)
+        patch.setattr(search, "_enabled", False)
+        patch.setattr(models.Base.metadata, "create_all", create_all)
+        main.startup_event()
+        assert search.is_enabled()
+        with profiler.query_budget(10) as statements:
+            response = client.get("/jobs", params={"q": "engineer"})
+    # Connections opened while this process was a worker are read-only.
+    database.engine.dispose()
+    assert response.status_code == 200
+    assert "Software Engineer" in [job["title"] for job in response.json()]
+    assert any(search.JOBS_FTS_TABLE in statement for statement in statements)
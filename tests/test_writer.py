@@ -0,0 +1,47 @@
+import os
+import stat
+import threading
+from multiprocessing.connection import AuthenticationError, Client
+
+import pytest
+from sqlalchemy import func, select
+
+from workly import database, models, retention, storage, writer
+
+
+@pytest.fixture
+def address(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(writer, "_serving", False)
+    monkeypatch.setattr(writer, "_pending", None)
+    address = str(tmp_path / "writer.sock")
+    listener = writer.serve(address, authkey=b"key")
+    yield address
+    listener.close()
+
+
+def test_writer_only_accepts_workers_with_the_key(address):
+    assert stat.S_IMODE(os.stat(address).st_mode) == 0o600
+    with pytest.raises(AuthenticationError):
+        Client(address, family="AF_UNIX", authkey=b"other")
+    with Client(address, family="AF_UNIX", authkey=b"key") as connection:
+        connection.send(("delete_application", (), {"application_id": 10**9}))
+        assert connection.recv() == (True, None)
+
+
+def test_writer_needs_a_key(tmp_path):
+    with pytest.raises(ValueError):
+        writer.serve(str(tmp_path / "writer.sock"), authkey=None)
+
+
+def test_jobs_run_on_the_writer_thread(address):
+    assert writer.run_on_writer(threading.get_ident) != threading.get_ident()
+    with pytest.raises(ZeroDivisionError):
+        writer.run_on_writer(lambda: 1 / 0)
+    writer.run_on_writer(storage.run_maintenance, database.engine)
+    with database.SessionLocal() as db:
+        notifications = db.scalar(select(func.count(models.Notification.id)))
+    assert notifications > 0
+    removed = retention.prune(
+        max_age_days=0, max_rows=notifications - 1, run=writer.run_on_writer
+    )
+    assert removed == 1
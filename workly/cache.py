@@ -0,0 +1,223 @@
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import models
+
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory").lower()
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL = float(os.environ.get("CACHE_TTL", "60"))
+
+# A cache key is (table name, id). Entries are tagged with the keys of every
+# row they embed, so a change to an employer also drops the cached jobs and
+# applications that include it.
+Key = tuple[str, int]
+Tags = set[Key]
+
+
+class CacheBackend(ABC):
+    """
+    Interface for entity cache backends. Values are pydantic response models,
+    a shared backend (e.g. Redis) is expected to store them as JSON.
+    """
+
+    @abstractmethod
+    def get(self, key: Key) -> BaseModel | None:
+        ...
+
+    @abstractmethod
+    def set(self, key: Key, value: BaseModel, tags: Tags) -> None:
+        ...
+
+    @abstractmethod
+    def invalidate(self, tags: Tags) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+
+class NullCache(CacheBackend):
+    def get(self, key):
+        return None
+
+    def set(self, key, value, tags):
+        pass
+
+    def invalidate(self, tags):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {"backend": "none"}
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-process LRU cache with a per-entry time to live.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[Key, tuple[float, BaseModel, Tags]] = OrderedDict()
+        self._tagged: dict[Key, Tags] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _remove(self, key: Key) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, tags):
+        tags = tags | {key}
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tagged.get(tag, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tagged.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+BACKENDS = {"memory": MemoryCache, "none": NullCache}
+
+if CACHE_BACKEND not in BACKENDS:
+    raise ValueError(f"CACHE_BACKEND must be one of {', '.join(BACKENDS)}")
+
+backend: CacheBackend = BACKENDS[CACHE_BACKEND]()
+
+
+def set_backend(new_backend: CacheBackend) -> None:
+    global backend
+
+    backend = new_backend
+
+
+def bypass(session: Session) -> None:
+    """
+    Serve the lookups of session from the database and keep what it reads out
+    of the cache, for sessions whose rows may not match the cached ones.
+    """
+
+    session.info["cache_bypass"] = True
+
+
+def read_through(
+    db: Session, key: Key, load, response_model, tags=lambda obj: set()
+):
+    """
+    Return the cached response model for key. On a miss, load the ORM object,
+    convert it and cache it under its own key and the keys from tags(obj).
+    Missing rows are not cached, and sessions marked with bypass() neither
+    read nor fill the cache.
+    """
+
+    if db.info.get("cache_bypass"):
+        obj = load()
+        return None if obj is None else response_model.from_orm(obj)
+    value = backend.get(key)
+    if value is not None:
+        return value
+    obj = load()
+    if obj is None:
+        return None
+    value = response_model.from_orm(obj)
+    backend.set(key, value, tags(obj))
+    return value
+
+
+def cache_key(obj: models.Base) -> Key:
+    return (obj.__tablename__, obj.id)
+
+
+def invalidate_on_commit(session: Session, key: Key) -> None:
+    """
+    Drop the entries tagged with key once the session commits, for changes
+    made with Core statements that the flush events do not see.
+    """
+
+    session.info.setdefault("cache_invalidate", set()).add(key)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    # Deletes cascaded by the ORM show up in session.deleted as well.
+    changed = session.info.setdefault("cache_invalidate", set())
+    for obj in session.dirty | session.deleted:
+        if isinstance(obj, models.Base):
+            changed.add(cache_key(obj))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changes(session):
+    changed = session.info.pop("cache_invalidate", None)
+    if changed:
+        backend.invalidate(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("cache_invalidate", None)
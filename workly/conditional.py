@@ -0,0 +1,129 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.sql import text
+
+from . import models
+
+# Tables whose rows end up in each response, following the nesting of the
+# response models in schema.py.
+DEPENDENCIES = {
+    "employers": ("employers",),
+    "jobs": ("jobs", "employers"),
+    "applicants": ("applicants",),
+    "resumes": ("resumes", "applicants"),
+    "applications": ("applications", "jobs", "employers", "resumes", "applicants"),
+    "notifications": ("notifications", "jobs", "employers"),
+}
+
+
+def _version_statement(model):
+    if model is models.Job:
+        return select(models.Job.updated_at, models.Employer.updated_at).join(
+            models.Job.employer
+        )
+    if model is models.Resume:
+        return select(models.Resume.updated_at, models.Applicant.updated_at).join(
+            models.Resume.applicant
+        )
+    if model is models.Application:
+        employer = aliased(models.Employer)
+        applicant = aliased(models.Applicant)
+        return (
+            select(
+                models.Application.updated_at,
+                models.Job.updated_at,
+                employer.updated_at,
+                models.Resume.updated_at,
+                applicant.updated_at,
+            )
+            .join(models.Application.job)
+            .join(employer, models.Job.employer)
+            .join(models.Application.resume)
+            .join(applicant, models.Resume.applicant)
+        )
+    return select(model.updated_at)
+
+
+def row_version(db: Session, model, id: int) -> datetime | None:
+    """
+    The most recent updated_at of a row and every row embedded in its
+    response, read with a single primary key lookup.
+    """
+
+    row = db.execute(_version_statement(model).where(model.id == id)).first()
+    if row is None:
+        return None
+    return max(row)
+
+
+def collection_versions(db: Session, table: str) -> list[tuple[str, int]]:
+    names = DEPENDENCIES[table]
+    params = {f"name_{i}": name for i, name in enumerate(names)}
+    placeholders = ", ".join(f":{key}" for key in params)
+    return db.execute(
+        text(
+            f"SELECT name, version FROM collection_versions "
+            f"WHERE name IN ({placeholders}) ORDER BY name"
+        ),
+        params,
+    ).all()
+
+
+def row_etag(table: str, id: int, version: datetime) -> str:
+    return f'"{table}-{id}-{version.timestamp():.6f}"'
+
+
+def collection_etag(request: Request, versions: list[tuple[str, int]]) -> str:
+    digest = hashlib.sha1(str(request.url.path).encode())
+    digest.update(request.url.query.encode())
+    for name, version in versions:
+        digest.update(f"{name}={version};".encode())
+    return f'"{digest.hexdigest()[:20]}"'
+
+
+def _utc(value: datetime) -> datetime:
+    # updated_at is a naive local timestamp (datetime.now), so it is converted
+    # rather than relabelled, the same way row_etag's timestamp() reads it.
+    return value.replace(microsecond=0).astimezone(timezone.utc)
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(_utc(value), True)
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: datetime | None = None
+) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return _utc(last_modified) <= since
+    return False
+
+
+def set_validators(
+    response: Response, etag: str, last_modified: datetime | None = None
+) -> None:
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+
+
+def not_modified_response(etag: str, last_modified: datetime | None = None):
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+    return response
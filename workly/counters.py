@@ -0,0 +1,253 @@
+"""
+Application counts per job and per employer, broken down by status.
+
+The counter tables are maintained by triggers on applications and jobs, so
+reading the counts is a primary key lookup and never scans applications.
+
+    python -m workly.counters check
+    python -m workly.counters rebuild
+"""
+
+import argparse
+import sys
+
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+
+from . import models
+from .database import SessionLocal
+
+JOB_COUNTS_TABLE = "job_application_counts"
+EMPLOYER_COUNTS_TABLE = "employer_application_counts"
+
+# Counter column per status. The Enum column stores the member names.
+STATUSES = {status.value: status.name for status in models.ApplicationStatus}
+
+
+def _adjust(table: str, key: str, key_value: str, row: str, sign: str) -> str:
+    changes = ", ".join(
+        f"{column} = {column} {sign} ({row}.status = '{name}')"
+        for column, name in STATUSES.items()
+    )
+    return f"""\
+    INSERT INTO {table} ({key}) VALUES ({key_value}) ON CONFLICT DO NOTHING;
+    UPDATE {table} SET {changes} WHERE {key} = {key_value};"""
+
+
+def _employer_of(row: str) -> str:
+    return f"(SELECT employer_id FROM jobs WHERE id = {row}.job_id)"
+
+
+def create_counters(db: Session) -> None:
+    """
+    Create the counter tables and the triggers that keep them up to date. The
+    counters are rebuilt from the applications table the first time they are
+    created.
+    """
+
+    exists = db.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": JOB_COUNTS_TABLE},
+    ).first()
+
+    columns = "".join(
+        f",\n    {column} INTEGER NOT NULL DEFAULT 0" for column in STATUSES
+    )
+    for table, key in (
+        (JOB_COUNTS_TABLE, "job_id"),
+        (EMPLOYER_COUNTS_TABLE, "employer_id"),
+    ):
+        db.execute(
+            text(
+                f"""\
+CREATE TABLE IF NOT EXISTS {table} (
+    {key} INTEGER PRIMARY KEY{columns}
+);"""
+            )
+        )
+
+    add = (
+        _adjust(JOB_COUNTS_TABLE, "job_id", "NEW.job_id", "NEW", "+")
+        + "\n"
+        + _adjust(EMPLOYER_COUNTS_TABLE, "employer_id", _employer_of("NEW"), "NEW", "+")
+    )
+    remove = (
+        _adjust(JOB_COUNTS_TABLE, "job_id", "OLD.job_id", "OLD", "-")
+        + "\n"
+        + _adjust(EMPLOYER_COUNTS_TABLE, "employer_id", _employer_of("OLD"), "OLD", "-")
+    )
+    triggers = {
+        "application_counts_insert": ("AFTER INSERT ON applications", add),
+        "application_counts_update": (
+            "AFTER UPDATE OF status, job_id ON applications",
+            remove + "\n" + add,
+        ),
+        # BEFORE so the job, and with it the employer, can still be looked up
+        # when the application is deleted together with its job.
+        "application_counts_delete": ("BEFORE DELETE ON applications", remove),
+    }
+    for name, (when, body) in triggers.items():
+        db.execute(
+            text(
+                f"""\
+CREATE TRIGGER IF NOT EXISTS {name} {when}
+FOR EACH ROW
+BEGIN
+{body}
+END;"""
+            )
+        )
+
+    moves = ", ".join(
+        f"{column} = {column} {{sign}} "
+        f"(SELECT {column} FROM {JOB_COUNTS_TABLE} WHERE job_id = NEW.id)"
+        for column in STATUSES
+    )
+    db.execute(
+        text(
+            f"""\
+CREATE TRIGGER IF NOT EXISTS job_counts_employer_update AFTER UPDATE OF employer_id ON jobs
+FOR EACH ROW WHEN OLD.employer_id != NEW.employer_id
+    AND EXISTS (SELECT 1 FROM {JOB_COUNTS_TABLE} WHERE job_id = NEW.id)
+BEGIN
+    UPDATE {EMPLOYER_COUNTS_TABLE} SET {moves.format(sign="-")}
+    WHERE employer_id = OLD.employer_id;
+    INSERT INTO {EMPLOYER_COUNTS_TABLE} (employer_id) VALUES (NEW.employer_id)
+    ON CONFLICT DO NOTHING;
+    UPDATE {EMPLOYER_COUNTS_TABLE} SET {moves.format(sign="+")}
+    WHERE employer_id = NEW.employer_id;
+END;"""
+        )
+    )
+    db.execute(
+        text(
+            f"""\
+CREATE TRIGGER IF NOT EXISTS job_counts_delete AFTER DELETE ON jobs
+FOR EACH ROW
+BEGIN
+    DELETE FROM {JOB_COUNTS_TABLE} WHERE job_id = OLD.id;
+END;"""
+        )
+    )
+    db.execute(
+        text(
+            f"""\
+CREATE TRIGGER IF NOT EXISTS employer_counts_delete AFTER DELETE ON employers
+FOR EACH ROW
+BEGIN
+    DELETE FROM {EMPLOYER_COUNTS_TABLE} WHERE employer_id = OLD.id;
+END;"""
+        )
+    )
+
+    if exists is None:
+        rebuild_counters(db)
+    db.commit()
+
+
+def _count_statement(key: str, source: str) -> str:
+    sums = ", ".join(
+        f"SUM(applications.status = '{name}') AS {column}"
+        for column, name in STATUSES.items()
+    )
+    return f"SELECT {key}, {sums} FROM {source} GROUP BY {key}"
+
+
+COUNT_SOURCES = {
+    JOB_COUNTS_TABLE: ("job_id", "applications"),
+    EMPLOYER_COUNTS_TABLE: (
+        "employer_id",
+        "applications JOIN jobs ON jobs.id = applications.job_id",
+    ),
+}
+
+
+def rebuild_counters(db: Session) -> None:
+    """
+    Recompute every counter from the applications table. Runs in the caller's
+    transaction.
+    """
+
+    columns = ", ".join(STATUSES)
+    for table, (key, source) in COUNT_SOURCES.items():
+        db.execute(text(f"DELETE FROM {table}"))
+        db.execute(
+            text(
+                f"INSERT INTO {table} ({key}, {columns}) "
+                f"{_count_statement(key, source)}"
+            )
+        )
+
+
+def check_counters(db: Session) -> list[dict]:
+    """
+    Compare the counters with a full count of the applications table and
+    return the rows that differ. Rows of zeros and missing rows are equal.
+    """
+
+    columns = ", ".join(STATUSES)
+    mismatches = []
+    for table, (key, source) in COUNT_SOURCES.items():
+        stored = {
+            row[0]: tuple(row[1:])
+            for row in db.execute(text(f"SELECT {key}, {columns} FROM {table}"))
+        }
+        actual = {
+            row[0]: tuple(row[1:])
+            for row in db.execute(text(_count_statement(key, source)))
+        }
+        zeros = (0,) * len(STATUSES)
+        for id in stored.keys() | actual.keys():
+            if stored.get(id, zeros) != actual.get(id, zeros):
+                mismatches.append(
+                    {
+                        "table": table,
+                        key: id,
+                        "stored": dict(zip(STATUSES, stored.get(id, zeros))),
+                        "actual": dict(zip(STATUSES, actual.get(id, zeros))),
+                    }
+                )
+    return mismatches
+
+
+def _counts(db: Session, table: str, key: str, parent: str, id: int):
+    row = db.execute(
+        text(
+            f"SELECT {parent}.id, {', '.join(f'{table}.{c}' for c in STATUSES)} "
+            f"FROM {parent} LEFT JOIN {table} ON {table}.{key} = {parent}.id "
+            f"WHERE {parent}.id = :id"
+        ),
+        {"id": id},
+    ).first()
+    if row is None:
+        return None
+    counts = {column: value or 0 for column, value in zip(STATUSES, row[1:])}
+    counts["total"] = sum(counts.values())
+    return counts
+
+
+def get_job_counts(db: Session, job_id: int) -> dict | None:
+    return _counts(db, JOB_COUNTS_TABLE, "job_id", "jobs", job_id)
+
+
+def get_employer_counts(db: Session, employer_id: int) -> dict | None:
+    return _counts(db, EMPLOYER_COUNTS_TABLE, "employer_id", "employers", employer_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("command", choices=("check", "rebuild"))
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        if args.command == "rebuild":
+            rebuild_counters(db)
+            db.commit()
+        mismatches = check_counters(db)
+    for mismatch in mismatches:
+        print(mismatch, file=sys.stderr)
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
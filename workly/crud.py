@@ -1,53 +1,87 @@
+from datetime import datetime
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from . import models, schema
+from . import cache, loaders, models, schema, search
+from .pagination import Cursor, paginate
+
+BATCH_CHUNK_SIZE = 500
 
 
 def get_employer(db: Session, employer_id: int):
-    return db.query(models.Employer).filter(models.Employer.id == employer_id).first()
+    return cache.read_through(
+        db,
+        ("employers", employer_id),
+        lambda: db.query(models.Employer)
+        .filter(models.Employer.id == employer_id)
+        .first(),
+        schema.Employer,
+    )
 
 
 def get_employer_by_email(db: Session, email: str):
     return db.query(models.Employer).filter(models.Employer.email == email).first()
 
 
-def get_employers(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Employer).offset(skip).limit(limit).all()
+def get_employers(
+    db: Session, skip: int = 0, limit: int = 100, cursor: Cursor | None = None
+):
+    return paginate(
+        db.query(models.Employer),
+        models.Employer,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        descending=False,
+    ).all()
 
 
 def create_employer(db: Session, employer: schema.EmployerCreate):
-    db_employer = models.Employer(
-        name=employer.name, email=employer.email, phone=employer.phone
-    )
-    db.add(db_employer)
-    db.commit()
-    db.refresh(db_employer)
-    return db_employer
+    row = insert_unless_exists(db, models.Employer, employer.dict())
+    if row is None:
+        return None
+    return schema.Employer(**row._mapping)
+
+
+def upsert_employer(db: Session, employer: schema.EmployerCreate):
+    row, created = upsert_by_email(db, models.Employer, employer.dict())
+    return schema.Employer(**row._mapping), created
 
 
 def update_employer(db: Session, employer: schema.EmployerUpdate, employer_id: int):
-    db_employer = (
-        db.query(models.Employer).filter(models.Employer.id == employer_id).first()
-    )
-    db_employer.name = employer.name
-    db_employer.email = employer.email
-    db_employer.phone = employer.phone
-    db.commit()
-    db.refresh(db_employer)
-    return db_employer
+    row = update_returning(db, models.Employer, employer_id, employer.dict())
+    if row is None:
+        return None
+    return schema.Employer(**row._mapping)
 
 
 def delete_employer(db: Session, employer_id: int):
-    db_employer = (
-        db.query(models.Employer).filter(models.Employer.id == employer_id).first()
+    job_ids = select(models.Job.id).where(models.Job.employer_id == employer_id)
+    return delete_returning(
+        db,
+        models.Employer,
+        employer_id,
+        (
+            *_delete_job_dependents(job_ids),
+            delete(models.Job).where(models.Job.employer_id == employer_id),
+        ),
     )
-    db.delete(db_employer)
-    db.commit()
-    return db_employer
 
 
 def get_job(db: Session, job_id: int):
-    return db.query(models.Job).filter(models.Job.id == job_id).first()
+    return cache.read_through(
+        db,
+        ("jobs", job_id),
+        lambda: db.query(models.Job)
+        .options(*loaders.job)
+        .filter(models.Job.id == job_id)
+        .first(),
+        schema.Job,
+        lambda job: {("employers", job.employer_id)},
+    )
 
 
 def get_jobs(
@@ -57,17 +91,50 @@ def get_jobs(
     title: str = "",
     location: str = "",
     employer: str = "",
+    query: str = "",
+    cursor: Cursor | None = None,
+    options: tuple = loaders.job,
 ):
-    return (
-        db.query(models.Job)
-        .filter(models.Job.title.contains(title))
-        .filter(models.Job.location.contains(location))
-        .filter(models.Job.employer.has(models.Employer.name.contains(employer)))
-        .order_by(models.Job.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+    expression = search.match_expression(
+        query=query, title=title, location=location, employer=employer
     )
+    if expression and search.is_enabled():
+        match = search.match_subquery(expression)
+        db_query = (
+            db.query(models.Job)
+            .options(*options)
+            .join(match, models.Job.id == match.c.job_id)
+        )
+        if query and cursor is None:
+            return (
+                db_query.order_by(match.c.rank, models.Job.created_at.desc())
+                .offset(skip)
+                .limit(limit)
+                .all()
+            )
+        return paginate(
+            db_query, models.Job, skip=skip, limit=limit, cursor=cursor
+        ).all()
+
+    db_query = db.query(models.Job).options(*options)
+    if title:
+        db_query = db_query.filter(models.Job.title.contains(title))
+    if location:
+        db_query = db_query.filter(models.Job.location.contains(location))
+    if employer:
+        db_query = db_query.filter(
+            models.Job.employer.has(models.Employer.name.contains(employer))
+        )
+    if query:
+        db_query = db_query.filter(
+            or_(
+                models.Job.title.contains(query),
+                models.Job.description.contains(query),
+                models.Job.location.contains(query),
+                models.Job.employer.has(models.Employer.name.contains(query)),
+            )
+        )
+    return paginate(db_query, models.Job, skip=skip, limit=limit, cursor=cursor).all()
 
 
 def create_employer_job(db: Session, job: schema.JobCreate):
@@ -81,32 +148,28 @@ def create_employer_job(db: Session, job: schema.JobCreate):
     )
     db.add(db_job)
     db.commit()
-    db.refresh(db_job)
-    return db_job
+    return get_job(db, job_id=db_job.id)
 
 
 def update_job(db: Session, job: schema.JobUpdate, job_id: int):
-    db_job = db.query(models.Job).filter(models.Job.id == job_id).first()
-    db_job.title = job.title
-    db_job.description = job.description
-    db_job.location = job.location
-    db_job.salary = job.salary
-    db_job.status = job.status
-    db.commit()
-    db.refresh(db_job)
-    return db_job
+    row = update_returning(db, models.Job, job_id, job.dict())
+    if row is None:
+        return None
+    return schema.Job(**row._mapping, employer=get_employer(db, row.employer_id))
 
 
 def delete_job(db: Session, job_id: int):
-    db_job = db.query(models.Job).filter(models.Job.id == job_id).first()
-    db.delete(db_job)
-    db.commit()
-    return db_job
+    return delete_returning(db, models.Job, job_id, _delete_job_dependents([job_id]))
 
 
 def get_applicant(db: Session, applicant_id: int):
-    return (
-        db.query(models.Applicant).filter(models.Applicant.id == applicant_id).first()
+    return cache.read_through(
+        db,
+        ("applicants", applicant_id),
+        lambda: db.query(models.Applicant)
+        .filter(models.Applicant.id == applicant_id)
+        .first(),
+        schema.Applicant,
     )
 
 
@@ -114,95 +177,141 @@ def get_applicant_by_email(db: Session, email: str):
     return db.query(models.Applicant).filter(models.Applicant.email == email).first()
 
 
-def get_applicants(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Applicant).offset(skip).limit(limit).all()
+def get_applicants(
+    db: Session, skip: int = 0, limit: int = 100, cursor: Cursor | None = None
+):
+    return paginate(
+        db.query(models.Applicant),
+        models.Applicant,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        descending=False,
+    ).all()
 
 
 def create_applicant(db: Session, applicant: schema.ApplicantCreate):
-    db_applicant = models.Applicant(
-        name=applicant.name, email=applicant.email, phone=applicant.phone
-    )
-    db.add(db_applicant)
-    db.commit()
-    db.refresh(db_applicant)
-    return db_applicant
+    row = insert_unless_exists(db, models.Applicant, applicant.dict())
+    if row is None:
+        return None
+    return schema.Applicant(**row._mapping)
+
+
+def upsert_applicant(db: Session, applicant: schema.ApplicantCreate):
+    row, created = upsert_by_email(db, models.Applicant, applicant.dict())
+    return schema.Applicant(**row._mapping), created
 
 
 def update_applicant(db: Session, applicant: schema.ApplicantUpdate, applicant_id: int):
-    db_applicant = (
-        db.query(models.Applicant).filter(models.Applicant.id == applicant_id).first()
-    )
-    db_applicant.name = applicant.name
-    db_applicant.email = applicant.email
-    db_applicant.phone = applicant.phone
-    db.commit()
-    db.refresh(db_applicant)
-    return db_applicant
+    row = update_returning(db, models.Applicant, applicant_id, applicant.dict())
+    if row is None:
+        return None
+    return schema.Applicant(**row._mapping)
 
 
 def delete_applicant(db: Session, applicant_id: int):
-    db_applicant = (
-        db.query(models.Applicant).filter(models.Applicant.id == applicant_id).first()
+    resume_ids = select(models.Resume.id).where(
+        models.Resume.applicant_id == applicant_id
+    )
+    return delete_returning(
+        db,
+        models.Applicant,
+        applicant_id,
+        (
+            *_delete_resume_dependents(resume_ids),
+            delete(models.Resume).where(models.Resume.applicant_id == applicant_id),
+        ),
     )
-    db.delete(db_applicant)
-    db.commit()
-    return db_applicant
 
 
 def get_resume(db: Session, resume_id: int):
-    return db.query(models.Resume).filter(models.Resume.id == resume_id).first()
+    return cache.read_through(
+        db,
+        ("resumes", resume_id),
+        lambda: db.query(models.Resume)
+        .options(*loaders.resume)
+        .filter(models.Resume.id == resume_id)
+        .first(),
+        schema.Resume,
+        lambda resume: {("applicants", resume.applicant_id)},
+    )
 
 
-def get_resumes(db: Session, applicant_id: int, skip: int = 0, limit: int = 100):
-    return (
+def get_resumes(
+    db: Session,
+    applicant_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Cursor | None = None,
+    options: tuple = loaders.resume,
+):
+    return paginate(
         db.query(models.Resume)
-        .filter(models.Resume.applicant_id == applicant_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+        .options(*options)
+        .filter(models.Resume.applicant_id == applicant_id),
+        models.Resume,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        descending=False,
+    ).all()
 
 
 def create_applicant_resume(db: Session, resume: schema.ResumeCreate):
     db_resume = models.Resume(resume=resume.resume, applicant_id=resume.applicant_id)
     db.add(db_resume)
     db.commit()
-    db.refresh(db_resume)
-    return db_resume
+    return get_resume(db, resume_id=db_resume.id)
 
 
 def update_resume(db: Session, resume: schema.ResumeUpdate, resume_id: int):
-    db_resume = db.query(models.Resume).filter(models.Resume.id == resume_id).first()
-    db_resume.resume = resume.resume
-    db.commit()
-    db.refresh(db_resume)
-    return db_resume
+    row = update_returning(db, models.Resume, resume_id, {"resume": resume.resume})
+    if row is None:
+        return None
+    return schema.Resume(**row._mapping, applicant=get_applicant(db, row.applicant_id))
 
 
 def delete_resume(db: Session, resume_id: int):
-    db_resume = db.query(models.Resume).filter(models.Resume.id == resume_id).first()
-    db.delete(db_resume)
-    db.commit()
-    return db_resume
+    return delete_returning(
+        db, models.Resume, resume_id, _delete_resume_dependents([resume_id])
+    )
 
 
 def get_application(db: Session, application_id: int):
-    return (
-        db.query(models.Application)
+    return cache.read_through(
+        db,
+        ("applications", application_id),
+        lambda: db.query(models.Application)
+        .options(*loaders.application)
         .filter(models.Application.id == application_id)
-        .first()
+        .first(),
+        schema.Application,
+        lambda application: {
+            ("jobs", application.job_id),
+            ("employers", application.job.employer_id),
+            ("resumes", application.resume_id),
+            ("applicants", application.resume.applicant_id),
+        },
     )
 
 
-def get_applications(db: Session, job_id: int, skip: int = 0, limit: int = 100):
-    return (
+def get_applications(
+    db: Session,
+    job_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Cursor | None = None,
+    options: tuple = loaders.application,
+):
+    return paginate(
         db.query(models.Application)
-        .filter(models.Application.job_id == job_id)
-        .order_by(models.Application.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+        .options(*options)
+        .filter(models.Application.job_id == job_id),
+        models.Application,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+    ).all()
 
 
 def create_application(db: Session, application: schema.ApplicationCreate):
@@ -214,40 +323,217 @@ def create_application(db: Session, application: schema.ApplicationCreate):
     )
     db.add(db_application)
     db.commit()
-    db.refresh(db_application)
-    return db_application
+    return get_application(db, application_id=db_application.id)
 
 
 def update_application(
     db: Session, application: schema.ApplicationUpdate, application_id: int
 ):
-    db_application = (
-        db.query(models.Application)
-        .filter(models.Application.id == application_id)
-        .first()
+    row = update_returning(
+        db, models.Application, application_id, {"status": application.status}
+    )
+    if row is None:
+        return None
+    return schema.Application(
+        **row._mapping,
+        job=get_job(db, row.job_id),
+        resume=get_resume(db, row.resume_id),
     )
-    db_application.status = application.status
-    db.commit()
-    db.refresh(db_application)
-    return db_application
 
 
 def delete_application(db: Session, application_id: int):
-    db_application = (
-        db.query(models.Application)
-        .filter(models.Application.id == application_id)
-        .first()
-    )
-    db.delete(db_application)
+    return delete_returning(db, models.Application, application_id)
+
+
+def get_notifications(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Cursor | None = None,
+    options: tuple = loaders.notification,
+):
+    return paginate(
+        db.query(models.Notification).options(*options),
+        models.Notification,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+    ).all()
+
+
+def update_returning(db: Session, model, id: int, values: dict):
+    """
+    Update a row with a single UPDATE ... RETURNING statement and commit.
+    Returns the updated row, or None if there is no row with that id.
+    """
+
+    table = model.__table__
+    row = db.execute(
+        update(table).where(table.c.id == id).values(**values).returning(*table.c)
+    ).first()
+    if row is None:
+        db.rollback()
+        return None
+    # Core statements bypass the session's change tracking, the cached rows
+    # that embed this one are dropped through its tag.
+    cache.invalidate_on_commit(db, (model.__tablename__, id))
+    db.commit()
+    return row
+
+
+def delete_returning(db: Session, model, id: int, dependents=()):
+    """
+    Delete a row with a single DELETE ... RETURNING statement, after the
+    dependents statements have deleted the rows referencing it, and commit.
+    Returns the id of the deleted row, or None if there is no row with that id.
+    """
+
+    for statement in dependents:
+        db.execute(statement)
+    table = model.__table__
+    row = db.execute(
+        delete(table).where(table.c.id == id).returning(table.c.id)
+    ).first()
+    if row is None:
+        db.rollback()
+        return None
+    cache.invalidate_on_commit(db, (model.__tablename__, id))
     db.commit()
-    return db_application
+    return row.id
 
 
-def get_notifications(db: Session, skip: int = 0, limit: int = 100):
+def _delete_job_dependents(job_ids):
     return (
-        db.query(models.Notification)
-        .order_by(models.Notification.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+        delete(models.Application).where(models.Application.job_id.in_(job_ids)),
+        delete(models.Notification).where(models.Notification.job_id.in_(job_ids)),
+    )
+
+
+def _delete_resume_dependents(resume_ids):
+    return (
+        delete(models.Application).where(models.Application.resume_id.in_(resume_ids)),
+    )
+
+
+def dialect_insert(db: Session, model):
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model.__table__)
+    return sqlite.insert(model.__table__)
+
+
+def insert_ignore_conflicts(db: Session, model, rows: list[dict], *returning):
+    """
+    Insert rows in one statement, skipping rows that conflict with a unique
+    index. Returns the id and the requested columns of the inserted rows.
+    """
+
+    statement = (
+        dialect_insert(db, model)
+        .on_conflict_do_nothing()
+        .returning(model.__table__.c.id, *returning)
+    )
+    return db.execute(statement, rows).all()
+
+
+def insert_unless_exists(db: Session, model, values: dict):
+    """
+    Insert a row with a single INSERT ... ON CONFLICT DO NOTHING RETURNING
+    statement and commit. Returns the inserted row, or None if it conflicts
+    with a unique index.
+    """
+
+    table = model.__table__
+    row = db.execute(
+        dialect_insert(db, model)
+        .values(**values)
+        .on_conflict_do_nothing()
+        .returning(*table.c)
+    ).first()
+    db.commit()
+    return row
+
+
+def upsert_by_email(db: Session, model, values: dict):
+    """
+    Insert a row, or update the row with the same email, with a single
+    INSERT ... ON CONFLICT DO UPDATE RETURNING statement and commit. A row
+    that already holds the same values is left untouched so its updated_at,
+    and with it its ETag, does not change. Returns the row and whether it was
+    created.
+    """
+
+    table = model.__table__
+    now = datetime.now()
+    statement = dialect_insert(db, model).values(
+        **values, created_at=now, updated_at=now
+    )
+    columns = [
+        column for column in table.c if column.name in values and column.name != "email"
+    ]
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.email],
+        set_={
+            **{column.name: statement.excluded[column.name] for column in columns},
+            "updated_at": now,
+        },
+        where=or_(
+            *(
+                column.is_distinct_from(statement.excluded[column.name])
+                for column in columns
+            )
+        ),
+    ).returning(*table.c)
+    row = db.execute(statement).first()
+    if row is None:
+        # Nothing to update, the existing row is returned as it is.
+        db.rollback()
+        row = db.execute(
+            select(*table.c).where(table.c.email == values["email"])
+        ).first()
+        return row, False
+    cache.invalidate_on_commit(db, (model.__tablename__, row.id))
+    db.commit()
+    return row, row.created_at == now
+
+
+def create_batch(
+    db: Session, model, rows: list[dict], chunk_size: int = BATCH_CHUNK_SIZE
+) -> list[int | IntegrityError]:
+    """
+    Insert rows with one multi-row INSERT per chunk, each chunk in its own
+    transaction. If a chunk violates a constraint it is rolled back and its
+    rows are inserted one at a time, so only the offending rows fail. Returns
+    the new id or the error for every row, in order.
+    """
+
+    if not rows:
+        return []
+    # RETURNING does not give the rows of a multi-row INSERT back in order on
+    # SQLite, the ids are matched to the rows by the inserted values. Rows
+    # with the same values are interchangeable.
+    keys = list(rows[0])
+    statement = insert(model).returning(
+        model.id, *(getattr(model, key) for key in keys)
     )
+    results = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start : start + chunk_size]
+        try:
+            ids: dict[tuple, list[int]] = {}
+            for id, *values in db.execute(statement, chunk):
+                ids.setdefault(tuple(values), []).append(id)
+            results.extend(
+                ids[tuple(row[key] for key in keys)].pop() for row in chunk
+            )
+            db.commit()
+            continue
+        except IntegrityError:
+            db.rollback()
+        for row in chunk:
+            try:
+                results.append(db.execute(statement, [row]).one().id)
+                db.commit()
+            except IntegrityError as e:
+                db.rollback()
+                results.append(e)
+    return results
@@ -1,19 +1,76 @@
-import logging
 import os
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from .sql_log import setup_sql_logging
+
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./workly.db")
+DATABASE_ASYNC = os.environ.get("DATABASE_ASYNC", "").lower() in ("1", "true", "yes")
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
 
-handler = logging.FileHandler("sql.log")
-handler.setLevel(logging.DEBUG)
-logging.getLogger("sqlalchemy").addHandler(handler)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
 
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False},
-    echo=True,
 )
+setup_sql_logging(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+replica_engines = [
+    create_engine(url, connect_args={"check_same_thread": False})
+    for url in DATABASE_REPLICA_URLS
+]
+for replica_engine in replica_engines:
+    setup_sql_logging(replica_engine)
+
+ReplicaSessionLocals = [
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    for replica_engine in replica_engines
+]
+
+
+def async_database_url(url: str) -> str:
+    """
+    Swap the driver of a database URL for its asyncio counterpart.
+    """
+
+    url = make_url(url)
+    if url.get_dialect().is_async:
+        return url.render_as_string(hide_password=False)
+    drivername = ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+async_engine = None
+AsyncSessionLocal = None
+async_replica_engines = []
+AsyncReplicaSessionLocals = []
+
+if DATABASE_ASYNC:
+    async_engine = create_async_engine(async_database_url(DATABASE_URL))
+    setup_sql_logging(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        autocommit=False, autoflush=False, bind=async_engine
+    )
+    async_replica_engines = [
+        create_async_engine(async_database_url(url)) for url in DATABASE_REPLICA_URLS
+    ]
+    for replica_engine in async_replica_engines:
+        setup_sql_logging(replica_engine.sync_engine)
+    AsyncReplicaSessionLocals = [
+        async_sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+        for replica_engine in async_replica_engines
+    ]
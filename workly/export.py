@@ -0,0 +1,109 @@
+import csv
+import enum
+import io
+
+from sqlalchemy import select
+
+from . import loaders, models, schema
+from .database import AsyncSessionLocal, SessionLocal
+
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ExportEntity(str, enum.Enum):
+    APPLICANTS = "applicants"
+    JOBS = "jobs"
+    APPLICATIONS = "applications"
+    NOTIFICATIONS = "notifications"
+
+
+EXPORTS = {
+    ExportEntity.APPLICANTS: (models.Applicant, schema.Applicant, loaders.applicant),
+    ExportEntity.JOBS: (models.Job, schema.Job, loaders.job),
+    ExportEntity.APPLICATIONS: (
+        models.Application,
+        schema.Application,
+        loaders.application,
+    ),
+    ExportEntity.NOTIFICATIONS: (
+        models.Notification,
+        schema.Notification,
+        loaders.notification,
+    ),
+}
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def _statement(entity: ExportEntity, fmt: ExportFormat, job_id: int | None):
+    model, _, options = EXPORTS[entity]
+    statement = select(model).order_by(model.id)
+    if fmt == ExportFormat.NDJSON:
+        statement = statement.options(*options)
+    if job_id is not None and hasattr(model, "job_id"):
+        statement = statement.where(model.job_id == job_id)
+    return statement.execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+
+def _columns(entity: ExportEntity) -> list[str]:
+    model = EXPORTS[entity][0]
+    return [column.key for column in model.__table__.columns]
+
+
+def _csv_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _encode(entity: ExportEntity, fmt: ExportFormat, rows) -> str:
+    if fmt == ExportFormat.NDJSON:
+        response_model = EXPORTS[entity][1]
+        return "".join(
+            response_model.from_orm(row).json(by_alias=True) + "\n" for row in rows
+        )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    columns = _columns(entity)
+    writer.writerows([_csv_value(getattr(row, c)) for c in columns] for row in rows)
+    return buffer.getvalue()
+
+
+def _header(entity: ExportEntity, fmt: ExportFormat) -> str:
+    if fmt == ExportFormat.NDJSON:
+        return ""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(_columns(entity))
+    return buffer.getvalue()
+
+
+def export_rows(entity: ExportEntity, fmt: ExportFormat, job_id: int | None = None):
+    """
+    Stream a collection in batches of EXPORT_BATCH_SIZE rows. Each batch is
+    encoded before the next one is fetched and the session only holds weak
+    references to the rows, so memory stays flat regardless of table size.
+    """
+
+    yield _header(entity, fmt)
+    with SessionLocal() as db:
+        result = db.scalars(_statement(entity, fmt, job_id))
+        for rows in result.partitions():
+            yield _encode(entity, fmt, rows)
+
+
+async def export_rows_async(
+    entity: ExportEntity, fmt: ExportFormat, job_id: int | None = None
+):
+    yield _header(entity, fmt)
+    async with AsyncSessionLocal() as db:
+        result = await db.stream_scalars(_statement(entity, fmt, job_id))
+        async for rows in result.partitions():
+            yield _encode(entity, fmt, rows)
@@ -0,0 +1,326 @@
+"""
+Synthetic dataset generator.
+
+Scale factor 1 produces 10k employers, 100k jobs, 1M applicants with 1.2M
+resumes and 5M applications. Employers and jobs follow a long tail: a few
+employers post most of the jobs and a few jobs receive most of the
+applications. Rows are created over the given number of days, in id order,
+and applications are decided more often the older they get. Generation is
+deterministic for a given seed.
+
+    python -m workly.generate --scale 1 --seed 42
+"""
+
+import argparse
+import bisect
+import itertools
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import Session
+
+from . import counters, models, storage
+from .database import SessionLocal, engine
+from .search import create_search_index
+from .triggers import create_triggers, create_version_triggers
+
+SCALE = {
+    "employers": 10_000,
+    "jobs": 100_000,
+    "applicants": 1_000_000,
+    "applications": 5_000_000,
+}
+RESUMES_PER_APPLICANT = 1.2
+GENERATE_CHUNK_SIZE = 10_000
+
+FIRST_NAMES = (
+    "James Mary Robert Patricia John Jennifer Michael Linda David Elizabeth "
+    "William Barbara Richard Susan Joseph Jessica Thomas Sarah Wei Priya "
+    "Carlos Fatima Hiroshi Olga Ahmed Sofia Kwame Ana Lucas Mei"
+).split()
+LAST_NAMES = (
+    "Smith Johnson Williams Brown Jones Garcia Miller Davis Rodriguez Martinez "
+    "Hernandez Lopez Wilson Anderson Thomas Taylor Moore Jackson Martin Lee "
+    "Chen Patel Kim Nguyen Singh Ivanova Okafor Silva Tanaka Muller"
+).split()
+COMPANY_WORDS = (
+    "Acme Globex Initech Umbrella Stark Wayne Hooli Vandelay Soylent Cyberdyne "
+    "Tyrell Wonka Aperture Massive Blue Red Green North Bright Quantum"
+).split()
+COMPANY_SUFFIXES = ("Inc", "Labs", "Systems", "Group", "Technologies", "Co")
+LEVELS = ("Junior", "", "", "Senior", "Staff", "Principal", "Lead")
+ROLES = (
+    "Software Engineer",
+    "Data Scientist",
+    "Product Manager",
+    "Designer",
+    "DevOps Engineer",
+    "Data Engineer",
+    "QA Engineer",
+    "Engineering Manager",
+    "Sales Representative",
+    "Support Specialist",
+    "Recruiter",
+    "Marketing Manager",
+)
+SKILLS = (
+    "Python SQL Go Rust TypeScript React Kubernetes AWS Terraform Figma "
+    "Spark Kafka PostgreSQL SQLite Excel Salesforce Linux Java Swift"
+).split()
+# City and relative share of the jobs posted there.
+LOCATIONS = {
+    "San Francisco, CA": 12,
+    "New York, NY": 14,
+    "Seattle, WA": 8,
+    "Austin, TX": 7,
+    "Boston, MA": 6,
+    "Chicago, IL": 5,
+    "Denver, CO": 4,
+    "Los Angeles, CA": 6,
+    "Atlanta, GA": 3,
+    "Remote": 20,
+}
+
+
+def long_tail(rng: random.Random, n: int, alpha: float = 1.5) -> list[float]:
+    """
+    Cumulative weights of n items drawn from a Pareto distribution, for
+    picking items with bisect.
+    """
+
+    return list(itertools.accumulate(rng.paretovariate(alpha) for _ in range(n)))
+
+
+def pick(rng: random.Random, cumulative: list[float]) -> int:
+    """
+    Index of an item picked by its weight.
+    """
+
+    return bisect.bisect(cumulative, rng.random() * cumulative[-1])
+
+
+def timestamps(start: datetime, end: datetime, n: int):
+    step = (end - start) / max(n, 1)
+    return (start + step * i for i in range(n))
+
+
+def employers(rng: random.Random, n: int, first_id: int, start: datetime, end):
+    for i, created_at in enumerate(timestamps(start, end, n)):
+        name = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}"
+        yield {
+            "id": first_id + i,
+            "name": name,
+            "email": f"jobs{first_id + i}@{name.split()[0].lower()}.example.com",
+            "phone": f"+1 555 {rng.randrange(10**7):07d}",
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def jobs(rng, n: int, first_id: int, employer_ids: range, start, end, created):
+    weights = long_tail(rng, len(employer_ids))
+    locations = list(LOCATIONS)
+    location_weights = list(itertools.accumulate(LOCATIONS.values()))
+    for i, created_at in enumerate(timestamps(start, end, n)):
+        created.append(created_at)
+        title = f"{rng.choice(LEVELS)} {rng.choice(ROLES)}".strip()
+        skills = ", ".join(rng.sample(SKILLS, 3))
+        salary = round(min(rng.lognormvariate(11.4, 0.35), 500_000), -3)
+        yield {
+            "id": first_id + i,
+            "title": title,
+            "description": f"We are hiring a {title} with experience in {skills}.",
+            "location": locations[
+                bisect.bisect(location_weights, rng.random() * location_weights[-1])
+            ],
+            "salary": max(int(salary), 1000),
+            "status": (
+                models.JobStatus.CLOSED
+                if (end - created_at).days > 90 and rng.random() < 0.7
+                else models.JobStatus.OPEN
+            ),
+            "employer_id": employer_ids[pick(rng, weights)],
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def applicants(rng: random.Random, n: int, first_id: int, start, end):
+    for i, created_at in enumerate(timestamps(start, end, n)):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield {
+            "id": first_id + i,
+            "name": f"{first} {last}",
+            "email": f"{first}.{last}.{first_id + i}@example.com".lower(),
+            "phone": f"+1 555 {rng.randrange(10**7):07d}"
+            if rng.random() < 0.6
+            else None,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def resumes(rng: random.Random, first_id: int, applicant_ids: range, start, end):
+    id = first_id
+    for applicant_id, created_at in zip(
+        applicant_ids, timestamps(start, end, len(applicant_ids))
+    ):
+        count = 1 + (rng.random() < RESUMES_PER_APPLICANT - 1)
+        for _ in range(count):
+            years = rng.randint(0, 20)
+            yield {
+                "id": id,
+                "resume": f"{rng.choice(ROLES)} with {years} years of experience. "
+                f"Skills: {', '.join(rng.sample(SKILLS, 4))}.",
+                "applicant_id": applicant_id,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+            id += 1
+
+
+def applications(
+    rng, n: int, first_id: int, job_ids: range, job_created, resume_ids, end
+):
+    weights = long_tail(rng, len(job_ids))
+    for i in range(n):
+        job = pick(rng, weights)
+        created_at = min(job_created[job] + timedelta(days=rng.expovariate(1 / 7)), end)
+        age = (end - created_at).days
+        decided = rng.random() < min(0.9, 0.15 + age / 60)
+        status = models.ApplicationStatus.PENDING
+        if decided:
+            status = (
+                models.ApplicationStatus.ACCEPTED
+                if rng.random() < 0.2
+                else models.ApplicationStatus.REJECTED
+            )
+        yield {
+            "id": first_id + i,
+            "cover_letter": "I would love to join your team.",
+            "status": status,
+            "job_id": job_ids[job],
+            "resume_id": rng.choice(resume_ids),
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def load(db: Session, model, rows, chunk_size: int = GENERATE_CHUNK_SIZE) -> int:
+    """
+    Insert rows in chunks of chunk_size with executemany, in one transaction.
+    Returns the number of rows inserted.
+    """
+
+    statement = insert(model.__table__)
+    count = 0
+    while chunk := list(itertools.islice(rows, chunk_size)):
+        db.execute(statement, chunk)
+        count += len(chunk)
+    db.commit()
+    return count
+
+
+def next_id(db: Session, model) -> int:
+    return (db.scalar(select(func.max(model.id))) or 0) + 1
+
+
+def generate(db: Session, scale: float = 0.01, seed: int = 0, days: int = 365):
+    """
+    Append a synthetic dataset of the given scale to the database, one
+    transaction per table. Yields the table name, row count and seconds taken
+    as every table is loaded.
+    """
+
+    rng = random.Random(seed)
+    sizes = {name: max(1, round(size * scale)) for name, size in SCALE.items()}
+    end = datetime.now()
+    start = end - timedelta(days=days)
+
+    def timed(name, model, rows):
+        started = time.perf_counter()
+        count = load(db, model, rows)
+        return name, count, time.perf_counter() - started
+
+    first = next_id(db, models.Employer)
+    employer_ids = range(first, first + sizes["employers"])
+    yield timed(
+        "employers",
+        models.Employer,
+        employers(rng, sizes["employers"], first, start, end),
+    )
+
+    first = next_id(db, models.Job)
+    job_ids = range(first, first + sizes["jobs"])
+    job_created: list[datetime] = []
+    yield timed(
+        "jobs",
+        models.Job,
+        jobs(rng, sizes["jobs"], first, employer_ids, start, end, job_created),
+    )
+
+    first = next_id(db, models.Applicant)
+    applicant_ids = range(first, first + sizes["applicants"])
+    yield timed(
+        "applicants",
+        models.Applicant,
+        applicants(rng, sizes["applicants"], first, start, end),
+    )
+
+    first = next_id(db, models.Resume)
+    yield timed(
+        "resumes",
+        models.Resume,
+        resumes(rng, first, applicant_ids, start, end),
+    )
+    resume_ids = range(first, next_id(db, models.Resume))
+
+    yield timed(
+        "applications",
+        models.Application,
+        applications(
+            rng,
+            sizes["applications"],
+            next_id(db, models.Application),
+            job_ids,
+            job_created,
+            resume_ids,
+            end,
+        ),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--scale", type=float, default=0.01, help="1 is 1M applicants, 5M applications"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=int, default=365, help="time span of the data")
+    args = parser.parse_args()
+
+    if engine.dialect.name == "sqlite":
+        event.listen(
+            engine,
+            "connect",
+            lambda dbapi_connection, _: storage.configure_connection(dbapi_connection),
+        )
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        create_triggers(db)
+        create_version_triggers(db)
+        create_search_index(db)
+        counters.create_counters(db)
+        for table, count, seconds in generate(db, args.scale, args.seed, args.days):
+            print(
+                f"{table:<13} {count:>10} rows {seconds:>8.1f}s "
+                f"{count / seconds:>10.0f} rows/s",
+                file=sys.stderr,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Bulk import of applicants and their resumes from NDJSON or CSV.
+
+Every record holds the fields of schema.ApplicantCreate plus an optional
+"resume" text. Records are parsed incrementally and written in batches, one
+transaction per batch. Applicants whose email already exists are skipped by
+the unique index, so re-running an import never creates duplicates.
+
+    python -m workly.importer applicants.csv --format csv --checkpoint import.ckpt
+"""
+
+import argparse
+import csv
+import enum
+import json
+import sys
+import uuid
+from datetime import datetime
+
+import anyio
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from . import crud, models, schema, writer
+from .database import SessionLocal
+
+IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+MAX_TRACKED_IMPORTS = 100
+
+
+class ImportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+# Progress of imports started through the API, keyed by import id.
+imports: dict[str, schema.ImportProgress] = {}
+
+
+def parse_records(lines, fmt: ImportFormat):
+    if fmt == ImportFormat.CSV:
+        for row in csv.DictReader(lines):
+            yield {key: value or None for key, value in row.items()}
+        return
+    for line in lines:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Rejected by validation like any other malformed record.
+                yield line
+
+
+def request_lines(stream):
+    """
+    Turn an async request body stream into a sync iterator of lines. Must be
+    called from a worker thread started by anyio.
+    """
+
+    buffer = b""
+    while True:
+        try:
+            chunk = anyio.from_thread.run(stream.__anext__)
+        except StopAsyncIteration:
+            break
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode() + "\n"
+    if buffer:
+        yield buffer.decode()
+
+
+def _error(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+        )
+    return str(e)
+
+
+def import_batch(db: Session, records: list[dict], progress: schema.ImportProgress):
+    applicants = []
+    resumes = {}
+    for record in records:
+        progress.processed += 1
+        try:
+            applicant = schema.ApplicantCreate.parse_obj(record)
+            resume = record.get("resume")
+            if resume:
+                resumes.setdefault(applicant.email, schema.ResumeBase(resume=resume))
+            applicants.append(applicant.dict())
+        except (ValidationError, TypeError) as e:
+            progress.failed += 1
+            if len(progress.errors) < MAX_REPORTED_ERRORS:
+                progress.errors.append(
+                    schema.ImportRecordError(record=progress.processed, error=_error(e))
+                )
+
+    if applicants:
+        now = datetime.now()
+        for applicant in applicants:
+            applicant["created_at"] = applicant["updated_at"] = now
+        inserted = crud.insert_ignore_conflicts(
+            db, models.Applicant, applicants, models.Applicant.__table__.c.email
+        )
+        rows = [
+            {
+                "resume": resumes[email].resume,
+                "applicant_id": applicant_id,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for applicant_id, email in inserted
+            if email in resumes
+        ]
+        if rows:
+            db.execute(insert(models.Resume.__table__), rows)
+        db.commit()
+        progress.imported += len(inserted)
+        progress.duplicates += len(applicants) - len(inserted)
+        progress.resumes += len(rows)
+    progress.checkpoint = progress.processed
+
+
+def write_batch(db: Session, records: list[dict], progress: schema.ImportProgress):
+    """
+    import_batch, on the writer process in multi-worker mode.
+    """
+
+    if not writer.is_enabled():
+        return import_batch(db, records, progress)
+    result = writer.call("import_batch", records, progress)
+    for name in result.__fields__:
+        setattr(progress, name, getattr(result, name))
+
+
+def import_records(
+    db: Session,
+    records,
+    progress: schema.ImportProgress,
+    batch_size: int = IMPORT_BATCH_SIZE,
+):
+    """
+    Import records in batches, skipping the first progress.checkpoint records
+    so an interrupted import can be resumed. Yields after every committed
+    batch.
+    """
+
+    skip = progress.checkpoint
+    progress.processed = skip
+    batch = []
+    for index, record in enumerate(records):
+        if index < skip:
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            write_batch(db, batch, progress)
+            batch = []
+            yield progress
+    if batch:
+        write_batch(db, batch, progress)
+    progress.done = True
+    yield progress
+
+
+def start_import(start: int = 0, import_id: str | None = None):
+    progress = schema.ImportProgress(
+        importId=import_id or uuid.uuid4().hex, checkpoint=start
+    )
+    imports[progress.import_id] = progress
+    while len(imports) > MAX_TRACKED_IMPORTS:
+        del imports[next(iter(imports))]
+    return progress
+
+
+def import_lines(lines, fmt: ImportFormat, progress: schema.ImportProgress):
+    with SessionLocal() as db:
+        for _ in import_records(db, parse_records(lines, fmt), progress):
+            pass
+    return progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("path", help="file to import, - for stdin")
+    parser.add_argument("--format", type=ImportFormat, default=ImportFormat.NDJSON)
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument(
+        "--checkpoint",
+        help="file recording the number of records imported, used to resume",
+    )
+    args = parser.parse_args()
+
+    start = 0
+    if args.checkpoint:
+        try:
+            with open(args.checkpoint) as f:
+                start = int(f.read().strip() or 0)
+        except FileNotFoundError:
+            pass
+
+    progress = start_import(start)
+    file = sys.stdin if args.path == "-" else open(args.path, newline="")
+    with file, SessionLocal() as db:
+        records = parse_records(file, args.format)
+        for progress in import_records(db, records, progress, args.batch_size):
+            if args.checkpoint:
+                with open(args.checkpoint, "w") as f:
+                    f.write(str(progress.checkpoint))
+            print(progress.json(by_alias=True, exclude={"errors"}), file=sys.stderr)
+
+    for error in progress.errors:
+        print(f"record {error.record}: {error.error}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
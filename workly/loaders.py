@@ -0,0 +1,35 @@
+from sqlalchemy.orm import joinedload
+
+from . import models
+
+# Eager loading options for each response model in schema.py. Every nested
+# relationship is many-to-one with a non-nullable foreign key, so they are
+# loaded with inner joins in the same SELECT as the parent rows.
+
+employer = ()
+
+job = (joinedload(models.Job.employer, innerjoin=True),)
+
+applicant = ()
+
+resume = (joinedload(models.Resume.applicant, innerjoin=True),)
+
+application_job = (
+    joinedload(models.Application.job, innerjoin=True).joinedload(
+        models.Job.employer, innerjoin=True
+    ),
+)
+
+application_resume = (
+    joinedload(models.Application.resume, innerjoin=True).joinedload(
+        models.Resume.applicant, innerjoin=True
+    ),
+)
+
+application = application_job + application_resume
+
+notification = (
+    joinedload(models.Notification.job, innerjoin=True).joinedload(
+        models.Job.employer, innerjoin=True
+    ),
+)
@@ -1,20 +1,71 @@
-from sqlite3 import Connection as SQLite3Connection
-
-from fastapi import Depends, FastAPI, HTTPException
-from fastapi.responses import RedirectResponse
+import asyncio
+import json
+from datetime import datetime
+
+from fastapi import (
+    Body,
+    Depends,
+    FastAPI,
+    HTTPException,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, RedirectResponse, StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
 
-from . import crud, models, schema
-from .database import SessionLocal, engine
+from . import (
+    cache,
+    conditional,
+    counters,
+    crud,
+    importer,
+    metrics,
+    migrations,
+    models,
+    notifications,
+    pagination,
+    profiler,
+    projections,
+    replication,
+    retention,
+    schema,
+    serializers,
+    storage,
+    writer,
+)
+from .database import (
+    DATABASE_ASYNC,
+    AsyncReplicaSessionLocals,
+    AsyncSessionLocal,
+    ReplicaSessionLocals,
+    SessionLocal,
+    async_engine,
+    async_replica_engines,
+    engine,
+    replica_engines,
+)
+from .export import (
+    MEDIA_TYPES,
+    ExportEntity,
+    ExportFormat,
+    export_rows,
+    export_rows_async,
+)
+from .search import create_search_index, detect_search_index
 from .seed import seed_database
-from .triggers import create_triggers
+from .triggers import create_triggers, create_version_triggers
 
 app = FastAPI(title="Workly", version="0.1.0", description="Workly API")
 
 
-def get_db():
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
@@ -22,19 +73,253 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+get_db = get_async_db if DATABASE_ASYNC else get_sync_db
+
+
+def bypass_cache(db: Session | AsyncSession, token: int | None) -> None:
+    # Replicas lag behind the primary, the rows they return must not replace
+    # fresher cached ones, and a read carrying a commit token must see the
+    # database rather than a copy cached before the write.
+    if token is not None or replication.is_enabled():
+        cache.bypass(db)
+
+
+def get_sync_read_db(request: Request):
+    """
+    A session on the next replica, or on the primary if no replica has
+    caught up with the commit token the client sent.
+    """
+
+    token = replication.requested_token(request)
+    for factory in replication.replica_order(ReplicaSessionLocals):
+        db = factory()
+        if token is None or replication.caught_up(db, token):
+            break
+        db.close()
+    else:
+        db = SessionLocal()
+    bypass_cache(db, token)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    token = replication.requested_token(request)
+    for factory in replication.replica_order(AsyncReplicaSessionLocals):
+        db = factory()
+        if token is None or await db.run_sync(replication.caught_up, token):
+            break
+        await db.close()
+    else:
+        db = AsyncSessionLocal()
+    bypass_cache(db, token)
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+get_read_db = get_async_read_db if DATABASE_ASYNC else get_sync_read_db
+
+
+async def run(fn, db: Session | AsyncSession, *args, **kwargs):
+    """
+    Run a crud function against the request session. Sync sessions are used on
+    the threadpool, async sessions run it on the event loop through run_sync.
+    """
+
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+async def write(fn, db: Session | AsyncSession, *args, **kwargs):
+    """
+    Run a crud function that writes. In multi-worker mode it runs on the
+    writer process, otherwise on the request session like run().
+    """
+
+    if writer.is_enabled():
+        return await run_in_threadpool(writer.call, fn.__name__, *args, **kwargs)
+    return await run(fn, db, *args, **kwargs)
+
+
+def get_cursor(cursor: str | None = None):
+    if cursor is None:
+        return None
+    try:
+        return pagination.decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(400, detail="Invalid cursor")
+
+
+def projection_of(response_model):
+    def get_projection(
+        view: projections.View = projections.View.FULL, fields: str = ""
+    ) -> projections.Projection:
+        try:
+            return projections.project(response_model, view, fields)
+        except ValueError as e:
+            raise HTTPException(400, detail=str(e))
+
+    return get_projection
+
+
+def set_next_cursor(response: Response, items: list, limit: int):
+    next_cursor = pagination.next_cursor(items, limit)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+
+async def create_batch(
+    db: Session, create_schema, model, items: list[dict]
+) -> schema.BatchResult:
+    results = []
+    rows = []
+    indexes = []
+    for index, item in enumerate(items):
+        try:
+            rows.append(create_schema.parse_obj(item).dict())
+            indexes.append(index)
+        except ValidationError as e:
+            error = "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+            )
+            results.append(schema.BatchItemResult(index=index, error=error))
+
+    created = await write(crud.create_batch, db, model, rows)
+    for index, result in zip(indexes, created):
+        if isinstance(result, int):
+            results.append(schema.BatchItemResult(index=index, id=result))
+        else:
+            results.append(schema.BatchItemResult(index=index, error=str(result.orig)))
+
+    results.sort(key=lambda result: result.index)
+    return schema.BatchResult(
+        created=sum(result.id is not None for result in results), results=results
+    )
+
+
+async def check_row(
+    request: Request, response: Response, db: Session, model, id: int
+) -> Response | None:
+    """
+    Return a 304 response if the client's copy of a row is current, otherwise
+    set its ETag and Last-Modified on the response and return None.
+    """
+
+    version = await run(conditional.row_version, db, model, id)
+    if version is None:
+        return None
+    etag = conditional.row_etag(model.__tablename__, id, version)
+    if conditional.is_not_modified(request, etag, version):
+        return conditional.not_modified_response(etag, version)
+    conditional.set_validators(response, etag, version)
+    return None
+
+
+async def check_collection(
+    request: Request, response: Response, db: Session, table: str
+) -> Response | None:
+    versions = await run(conditional.collection_versions, db, table)
+    etag = conditional.collection_etag(request, versions)
+    if conditional.is_not_modified(request, etag):
+        return conditional.not_modified_response(etag)
+    conditional.set_validators(response, etag)
+    return None
+
+
 @app.on_event(event_type="startup")
 def startup_event():
+    if writer.is_enabled():
+        # The writer process sets up the schema, workers only read.
+        detect_search_index(next(get_sync_db()))
+        return
     models.Base.metadata.create_all(bind=engine)
-    create_triggers(next(get_db()))
-    seed_database(next(get_db()))
+    migrations.migrate(next(get_sync_db()))
+    create_triggers(next(get_sync_db()))
+    create_version_triggers(next(get_sync_db()))
+    create_search_index(next(get_sync_db()))
+    counters.create_counters(next(get_sync_db()))
+    seed_database(next(get_sync_db()))
+    if replication.replica_files():
+        replication.refresh_replicas()
+
+
+@app.on_event(event_type="startup")
+async def start_background_tasks():
+    app.state.tasks = [asyncio.create_task(notifications.feed.run())]
+    if writer.is_enabled():
+        # Retention, maintenance and replica refreshes write, the writer
+        # process runs them on its writer thread.
+        return
+    if retention.is_enabled():
+        app.state.tasks.append(asyncio.create_task(retention.retention_loop()))
+    if engine.dialect.name == "sqlite" and storage.SQLITE_MAINTENANCE_INTERVAL > 0:
+        app.state.tasks.append(asyncio.create_task(storage.maintenance_loop(engine)))
+    if replication.replica_files() and replication.REPLICA_REFRESH_INTERVAL > 0:
+        app.state.tasks.append(asyncio.create_task(replication.refresh_loop()))
+
+
+@app.on_event(event_type="shutdown")
+async def stop_background_tasks():
+    for task in getattr(app.state, "tasks", []):
+        task.cancel()
 
 
 @event.listens_for(engine, "connect")
 def connect(dbapi_connection, connection_record):
-    if isinstance(dbapi_connection, SQLite3Connection):
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON;")
-        cursor.close()
+    if engine.dialect.name == "sqlite":
+        storage.configure_connection(dbapi_connection, read_only=writer.is_enabled())
+
+
+if async_engine is not None:
+    event.listen(async_engine.sync_engine, "connect", connect)
+
+
+def connect_replica(dbapi_connection, connection_record):
+    storage.configure_connection(dbapi_connection, read_only=True)
+
+
+for replica_engine in (
+    *replica_engines,
+    *(replica_engine.sync_engine for replica_engine in async_replica_engines),
+):
+    if replica_engine.dialect.name == "sqlite":
+        event.listen(replica_engine, "connect", connect_replica)
+
+if writer.is_enabled():
+    # The writer's cache invalidations do not reach the other processes.
+    cache.set_backend(cache.NullCache())
+
+if replication.is_enabled():
+    app.add_middleware(replication.CommitTokenMiddleware)
+
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine, "sync")
+if async_engine is not None:
+    metrics.instrument_engine(async_engine.sync_engine, "async")
+for i, replica_engine in enumerate(replica_engines):
+    metrics.instrument_engine(replica_engine, f"replica{i}")
+for i, replica_engine in enumerate(async_replica_engines):
+    metrics.instrument_engine(replica_engine.sync_engine, f"async_replica{i}")
+
+if profiler.SQL_PROFILE:
+    app.add_middleware(profiler.ProfilerMiddleware)
+    profiler.instrument_engine(engine)
+    if async_engine is not None:
+        profiler.instrument_engine(async_engine.sync_engine)
+    for replica_engine in replica_engines:
+        profiler.instrument_engine(replica_engine)
+    for replica_engine in async_replica_engines:
+        profiler.instrument_engine(replica_engine.sync_engine)
 
 
 @app.get("/", include_in_schema=False)
@@ -42,9 +327,19 @@ def docs_redirect():
     return RedirectResponse(url="/docs", status_code=301)
 
 
+@app.get("/cache/stats", include_in_schema=False, status_code=200)
+def cache_stats():
+    return cache.backend.stats()
+
+
+@app.get("/metrics", include_in_schema=False, status_code=200)
+async def read_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/healthcheck", include_in_schema=False, status_code=200)
-def health_check(db: Session = Depends(get_db)):
-    db.execute(text("SELECT 1")).fetchone()
+async def health_check(db: Session = Depends(get_db)):
+    await run(lambda db: db.execute(text("SELECT 1")).fetchone(), db)
     return {"status": "ok"}
 
 
@@ -55,11 +350,30 @@ def health_check(db: Session = Depends(get_db)):
     status_code=201,
     description="Create an employer",
 )
-def create_employer(employer: schema.EmployerCreate, db: Session = Depends(get_db)):
-    db_employer = crud.get_employer_by_email(db, email=employer.email)
-    if db_employer:
+async def create_employer(
+    employer: schema.EmployerCreate, db: Session = Depends(get_db)
+):
+    db_employer = await write(crud.create_employer, db, employer=employer)
+    if db_employer is None:
         raise HTTPException(400, detail="Email already registered")
-    return crud.create_employer(db=db, employer=employer)
+    return db_employer
+
+
+@app.put(
+    "/employers/upsert",
+    response_model=schema.Employer,
+    tags=["employers"],
+    status_code=200,
+    description="Create an employer, or update the employer with the same email",
+    responses={201: {"model": schema.Employer}},
+)
+async def upsert_employer(
+    employer: schema.EmployerCreate, response: Response, db: Session = Depends(get_db)
+):
+    db_employer, created = await write(crud.upsert_employer, db, employer=employer)
+    if created:
+        response.status_code = 201
+    return db_employer
 
 
 @app.put(
@@ -69,13 +383,15 @@ def create_employer(employer: schema.EmployerCreate, db: Session = Depends(get_d
     status_code=200,
     description="Update an employer",
 )
-def update_employer(
+async def update_employer(
     employer: schema.EmployerUpdate, employer_id: int, db: Session = Depends(get_db)
 ):
-    db_employer = crud.get_employer(db, employer_id=employer_id)
+    db_employer = await write(
+        crud.update_employer, db, employer=employer, employer_id=employer_id
+    )
     if db_employer is None:
         raise HTTPException(404, detail="Employer not found")
-    return crud.update_employer(db=db, employer=employer, employer_id=employer_id)
+    return db_employer
 
 
 @app.get(
@@ -85,9 +401,20 @@ def update_employer(
     status_code=200,
     description="Get all employers",
 )
-def read_employers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    employers = crud.get_employers(db, skip=skip, limit=limit)
-    return employers
+async def read_employers(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: pagination.Cursor | None = Depends(get_cursor),
+    db: Session = Depends(get_read_db),
+):
+    not_modified = await check_collection(request, response, db, "employers")
+    if not_modified is not None:
+        return not_modified
+    employers = await run(crud.get_employers, db, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, employers, limit)
+    return serializers.json_list_response(schema.Employer, employers, response)
 
 
 @app.get(
@@ -97,24 +424,47 @@ def read_employers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db
     status_code=200,
     description="Get an employer",
 )
-def read_employer(employer_id: int, db: Session = Depends(get_db)):
-    db_employer = crud.get_employer(db, employer_id=employer_id)
+async def read_employer(
+    employer_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+):
+    not_modified = await check_row(request, response, db, models.Employer, employer_id)
+    if not_modified is not None:
+        return not_modified
+    db_employer = await run(crud.get_employer, db, employer_id=employer_id)
     if db_employer is None:
         raise HTTPException(404, detail="Employer not found")
     return db_employer
 
 
+@app.get(
+    "/employers/{employer_id}/applications/counts",
+    response_model=schema.ApplicationCounts,
+    tags=["employers"],
+    status_code=200,
+    description="Get the number of applications to an employer's jobs by status",
+)
+async def read_employer_application_counts(
+    employer_id: int, db: Session = Depends(get_read_db)
+):
+    counts = await run(counters.get_employer_counts, db, employer_id=employer_id)
+    if counts is None:
+        raise HTTPException(404, detail="Employer not found")
+    return counts
+
+
 @app.delete(
     "/employers/{employer_id}",
     tags=["employers"],
     status_code=204,
     description="Delete an employer",
 )
-def delete_employer(employer_id: int, db: Session = Depends(get_db)):
-    db_employer = crud.get_employer(db, employer_id=employer_id)
-    if db_employer is None:
+async def delete_employer(employer_id: int, db: Session = Depends(get_db)):
+    deleted = await write(crud.delete_employer, db, employer_id=employer_id)
+    if deleted is None:
         raise HTTPException(404, detail="Employer not found")
-    crud.delete_employer(db=db, employer_id=employer_id)
 
 
 @app.post(
@@ -124,8 +474,19 @@ def delete_employer(employer_id: int, db: Session = Depends(get_db)):
     status_code=201,
     description="Create a job",
 )
-def create_job_for_employer(job: schema.JobCreate, db: Session = Depends(get_db)):
-    return crud.create_employer_job(db=db, job=job)
+async def create_job_for_employer(job: schema.JobCreate, db: Session = Depends(get_db)):
+    return await write(crud.create_employer_job, db, job=job)
+
+
+@app.post(
+    "/jobs/batch",
+    response_model=schema.BatchResult,
+    tags=["jobs"],
+    status_code=200,
+    description="Create jobs in bulk",
+)
+async def create_jobs_batch(items: list[dict] = Body(), db: Session = Depends(get_db)):
+    return await create_batch(db, schema.JobCreate, models.Job, items)
 
 
 @app.put(
@@ -135,11 +496,11 @@ def create_job_for_employer(job: schema.JobCreate, db: Session = Depends(get_db)
     status_code=200,
     description="Update a job",
 )
-def update_job(job: schema.JobUpdate, job_id: int, db: Session = Depends(get_db)):
-    db_job = crud.get_job(db, job_id=job_id)
+async def update_job(job: schema.JobUpdate, job_id: int, db: Session = Depends(get_db)):
+    db_job = await write(crud.update_job, db, job=job, job_id=job_id)
     if db_job is None:
         raise HTTPException(404, detail="Job not found")
-    return crud.update_job(db=db, job=job, job_id=job_id)
+    return db_job
 
 
 @app.get(
@@ -149,18 +510,38 @@ def update_job(job: schema.JobUpdate, job_id: int, db: Session = Depends(get_db)
     status_code=200,
     description="Get all jobs",
 )
-def search_jobs(
+async def search_jobs(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     title: str = "",
     location: str = "",
     employer: str = "",
-    db: Session = Depends(get_db),
+    q: str = "",
+    cursor: pagination.Cursor | None = Depends(get_cursor),
+    projection: projections.Projection = Depends(projection_of(schema.Job)),
+    db: Session = Depends(get_read_db),
 ):
-    jobs = crud.get_jobs(
-        db, skip=skip, limit=limit, title=title, location=location, employer=employer
+    not_modified = await check_collection(request, response, db, "jobs")
+    if not_modified is not None:
+        return not_modified
+    jobs = await run(
+        crud.get_jobs,
+        db,
+        skip=skip,
+        limit=limit,
+        title=title,
+        location=location,
+        employer=employer,
+        query=q,
+        cursor=cursor,
+        options=projection.options,
     )
-    return jobs
+    # Relevance-ranked pages are not ordered by (created_at, id).
+    if not q or cursor is not None:
+        set_next_cursor(response, jobs, limit)
+    return serializers.json_list_response(schema.Job, jobs, response, projection.fields)
 
 
 @app.get(
@@ -170,21 +551,42 @@ def search_jobs(
     status_code=200,
     description="Get a job",
 )
-def read_job(job_id: int, db: Session = Depends(get_db)):
-    db_job = crud.get_job(db, job_id=job_id)
+async def read_job(
+    job_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+):
+    not_modified = await check_row(request, response, db, models.Job, job_id)
+    if not_modified is not None:
+        return not_modified
+    db_job = await run(crud.get_job, db, job_id=job_id)
     if db_job is None:
         raise HTTPException(404, detail="Job not found")
     return db_job
 
 
+@app.get(
+    "/jobs/{job_id}/applications/counts",
+    response_model=schema.ApplicationCounts,
+    tags=["jobs"],
+    status_code=200,
+    description="Get the number of applications to a job by status",
+)
+async def read_job_application_counts(job_id: int, db: Session = Depends(get_read_db)):
+    counts = await run(counters.get_job_counts, db, job_id=job_id)
+    if counts is None:
+        raise HTTPException(404, detail="Job not found")
+    return counts
+
+
 @app.delete(
     "/jobs/{job_id}", tags=["jobs"], status_code=204, description="Delete a job"
 )
-def delete_job(job_id: int, db: Session = Depends(get_db)):
-    db_job = crud.get_job(db, job_id=job_id)
-    if db_job is None:
+async def delete_job(job_id: int, db: Session = Depends(get_db)):
+    deleted = await write(crud.delete_job, db, job_id=job_id)
+    if deleted is None:
         raise HTTPException(404, detail="Job not found")
-    crud.delete_job(db=db, job_id=job_id)
 
 
 @app.post(
@@ -194,11 +596,45 @@ def delete_job(job_id: int, db: Session = Depends(get_db)):
     status_code=201,
     description="Create an applicant",
 )
-def create_applicant(applicant: schema.ApplicantCreate, db: Session = Depends(get_db)):
-    db_applicant = crud.get_applicant_by_email(db, email=applicant.email)
-    if db_applicant:
+async def create_applicant(
+    applicant: schema.ApplicantCreate, db: Session = Depends(get_db)
+):
+    db_applicant = await write(crud.create_applicant, db, applicant=applicant)
+    if db_applicant is None:
         raise HTTPException(400, detail="Email already registered")
-    return crud.create_applicant(db=db, applicant=applicant)
+    return db_applicant
+
+
+@app.put(
+    "/applicants/upsert",
+    response_model=schema.Applicant,
+    tags=["applicants"],
+    status_code=200,
+    description="Create an applicant, or update the applicant with the same email",
+    responses={201: {"model": schema.Applicant}},
+)
+async def upsert_applicant(
+    applicant: schema.ApplicantCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    db_applicant, created = await write(crud.upsert_applicant, db, applicant=applicant)
+    if created:
+        response.status_code = 201
+    return db_applicant
+
+
+@app.post(
+    "/applicants/batch",
+    response_model=schema.BatchResult,
+    tags=["applicants"],
+    status_code=200,
+    description="Create applicants in bulk",
+)
+async def create_applicants_batch(
+    items: list[dict] = Body(), db: Session = Depends(get_db)
+):
+    return await create_batch(db, schema.ApplicantCreate, models.Applicant, items)
 
 
 @app.put(
@@ -208,13 +644,15 @@ def create_applicant(applicant: schema.ApplicantCreate, db: Session = Depends(ge
     status_code=200,
     description="Update an applicant",
 )
-def update_applicant(
+async def update_applicant(
     applicant: schema.ApplicantUpdate, applicant_id: int, db: Session = Depends(get_db)
 ):
-    db_applicant = crud.get_applicant(db, applicant_id=applicant_id)
+    db_applicant = await write(
+        crud.update_applicant, db, applicant=applicant, applicant_id=applicant_id
+    )
     if db_applicant is None:
         raise HTTPException(404, detail="Applicant not found")
-    return crud.update_applicant(db=db, applicant=applicant, applicant_id=applicant_id)
+    return db_applicant
 
 
 @app.get(
@@ -224,9 +662,22 @@ def update_applicant(
     status_code=200,
     description="Get all applicants",
 )
-def read_applicants(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    applicants = crud.get_applicants(db, skip=skip, limit=limit)
-    return applicants
+async def read_applicants(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: pagination.Cursor | None = Depends(get_cursor),
+    db: Session = Depends(get_read_db),
+):
+    not_modified = await check_collection(request, response, db, "applicants")
+    if not_modified is not None:
+        return not_modified
+    applicants = await run(
+        crud.get_applicants, db, skip=skip, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, applicants, limit)
+    return serializers.json_list_response(schema.Applicant, applicants, response)
 
 
 @app.get(
@@ -236,8 +687,18 @@ def read_applicants(skip: int = 0, limit: int = 100, db: Session = Depends(get_d
     status_code=200,
     description="Get an applicant",
 )
-def read_applicant(applicant_id: int, db: Session = Depends(get_db)):
-    db_applicant = crud.get_applicant(db, applicant_id=applicant_id)
+async def read_applicant(
+    applicant_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+):
+    not_modified = await check_row(
+        request, response, db, models.Applicant, applicant_id
+    )
+    if not_modified is not None:
+        return not_modified
+    db_applicant = await run(crud.get_applicant, db, applicant_id=applicant_id)
     if db_applicant is None:
         raise HTTPException(404, detail="Applicant not found")
     return db_applicant
@@ -249,11 +710,10 @@ def read_applicant(applicant_id: int, db: Session = Depends(get_db)):
     status_code=204,
     description="Delete an applicant",
 )
-def delete_applicant(applicant_id: int, db: Session = Depends(get_db)):
-    db_applicant = crud.get_applicant(db, applicant_id=applicant_id)
-    if db_applicant is None:
+async def delete_applicant(applicant_id: int, db: Session = Depends(get_db)):
+    deleted = await write(crud.delete_applicant, db, applicant_id=applicant_id)
+    if deleted is None:
         raise HTTPException(404, detail="Applicant not found")
-    crud.delete_applicant(db=db, applicant_id=applicant_id)
 
 
 @app.post(
@@ -263,10 +723,23 @@ def delete_applicant(applicant_id: int, db: Session = Depends(get_db)):
     status_code=201,
     description="Create a resume",
 )
-def create_resume_for_applicant(
+async def create_resume_for_applicant(
     resume: schema.ResumeCreate, db: Session = Depends(get_db)
 ):
-    return crud.create_applicant_resume(db=db, resume=resume)
+    return await write(crud.create_applicant_resume, db, resume=resume)
+
+
+@app.post(
+    "/resumes/batch",
+    response_model=schema.BatchResult,
+    tags=["resumes"],
+    status_code=200,
+    description="Create resumes in bulk",
+)
+async def create_resumes_batch(
+    items: list[dict] = Body(), db: Session = Depends(get_db)
+):
+    return await create_batch(db, schema.ResumeCreate, models.Resume, items)
 
 
 @app.put(
@@ -276,13 +749,13 @@ def create_resume_for_applicant(
     status_code=200,
     description="Update a resume",
 )
-def update_resume(
+async def update_resume(
     resume: schema.ResumeUpdate, resume_id: int, db: Session = Depends(get_db)
 ):
-    db_resume = crud.get_resume(db, resume_id=resume_id)
+    db_resume = await write(crud.update_resume, db, resume=resume, resume_id=resume_id)
     if db_resume is None:
         raise HTTPException(404, detail="Resume not found")
-    return crud.update_resume(db=db, resume=resume, resume_id=resume_id)
+    return db_resume
 
 
 @app.get(
@@ -292,11 +765,32 @@ def update_resume(
     status_code=200,
     description="Get all resumes",
 )
-def read_resumes_for_applicant(
-    applicant_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+async def read_resumes_for_applicant(
+    applicant_id: int,
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: pagination.Cursor | None = Depends(get_cursor),
+    projection: projections.Projection = Depends(projection_of(schema.Resume)),
+    db: Session = Depends(get_read_db),
 ):
-    resumes = crud.get_resumes(db, applicant_id, skip=skip, limit=limit)
-    return resumes
+    not_modified = await check_collection(request, response, db, "resumes")
+    if not_modified is not None:
+        return not_modified
+    resumes = await run(
+        crud.get_resumes,
+        db,
+        applicant_id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        options=projection.options,
+    )
+    set_next_cursor(response, resumes, limit)
+    return serializers.json_list_response(
+        schema.Resume, resumes, response, projection.fields
+    )
 
 
 @app.get(
@@ -306,8 +800,16 @@ def read_resumes_for_applicant(
     status_code=200,
     description="Get a resume",
 )
-def read_resume(resume_id: int, db: Session = Depends(get_db)):
-    db_resume = crud.get_resume(db, resume_id=resume_id)
+async def read_resume(
+    resume_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+):
+    not_modified = await check_row(request, response, db, models.Resume, resume_id)
+    if not_modified is not None:
+        return not_modified
+    db_resume = await run(crud.get_resume, db, resume_id=resume_id)
     if db_resume is None:
         raise HTTPException(404, detail="Resume not found")
     return db_resume
@@ -319,11 +821,10 @@ def read_resume(resume_id: int, db: Session = Depends(get_db)):
     status_code=204,
     description="Delete a resume",
 )
-def delete_resume(resume_id: int, db: Session = Depends(get_db)):
-    db_resume = crud.get_resume(db, resume_id=resume_id)
-    if db_resume is None:
+async def delete_resume(resume_id: int, db: Session = Depends(get_db)):
+    deleted = await write(crud.delete_resume, db, resume_id=resume_id)
+    if deleted is None:
         raise HTTPException(404, detail="Resume not found")
-    crud.delete_resume(db=db, resume_id=resume_id)
 
 
 @app.post(
@@ -333,10 +834,23 @@ def delete_resume(resume_id: int, db: Session = Depends(get_db)):
     status_code=201,
     description="Create an application",
 )
-def create_application_for_job(
+async def create_application_for_job(
     application: schema.ApplicationCreate, db: Session = Depends(get_db)
 ):
-    return crud.create_application(db=db, application=application)
+    return await write(crud.create_application, db, application=application)
+
+
+@app.post(
+    "/applications/batch",
+    response_model=schema.BatchResult,
+    tags=["applications"],
+    status_code=200,
+    description="Create applications in bulk",
+)
+async def create_applications_batch(
+    items: list[dict] = Body(), db: Session = Depends(get_db)
+):
+    return await create_batch(db, schema.ApplicationCreate, models.Application, items)
 
 
 @app.put(
@@ -346,17 +860,20 @@ def create_application_for_job(
     status_code=200,
     description="Update an application",
 )
-def update_application(
+async def update_application(
     application: schema.ApplicationUpdate,
     application_id: int,
     db: Session = Depends(get_db),
 ):
-    db_application = crud.get_application(db, application_id=application_id)
+    db_application = await write(
+        crud.update_application,
+        db,
+        application=application,
+        application_id=application_id,
+    )
     if db_application is None:
         raise HTTPException(404, detail="Application not found")
-    return crud.update_application(
-        db=db, application=application, application_id=application_id
-    )
+    return db_application
 
 
 @app.get(
@@ -366,11 +883,32 @@ def update_application(
     status_code=200,
     description="Get all applications",
 )
-def read_applications_for_job(
-    job_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+async def read_applications_for_job(
+    job_id: int,
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: pagination.Cursor | None = Depends(get_cursor),
+    projection: projections.Projection = Depends(projection_of(schema.Application)),
+    db: Session = Depends(get_read_db),
 ):
-    applications = crud.get_applications(db, job_id, skip=skip, limit=limit)
-    return applications
+    not_modified = await check_collection(request, response, db, "applications")
+    if not_modified is not None:
+        return not_modified
+    applications = await run(
+        crud.get_applications,
+        db,
+        job_id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        options=projection.options,
+    )
+    set_next_cursor(response, applications, limit)
+    return serializers.json_list_response(
+        schema.Application, applications, response, projection.fields
+    )
 
 
 @app.get(
@@ -380,8 +918,18 @@ def read_applications_for_job(
     status_code=200,
     description="Get an application",
 )
-def read_application(application_id: int, db: Session = Depends(get_db)):
-    db_application = crud.get_application(db, application_id=application_id)
+async def read_application(
+    application_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+):
+    not_modified = await check_row(
+        request, response, db, models.Application, application_id
+    )
+    if not_modified is not None:
+        return not_modified
+    db_application = await run(crud.get_application, db, application_id=application_id)
     if db_application is None:
         raise HTTPException(404, detail="Application not found")
     return db_application
@@ -393,11 +941,10 @@ def read_application(application_id: int, db: Session = Depends(get_db)):
     status_code=204,
     description="Delete an application",
 )
-def delete_application(application_id: int, db: Session = Depends(get_db)):
-    db_application = crud.get_application(db, application_id=application_id)
-    if db_application is None:
+async def delete_application(application_id: int, db: Session = Depends(get_db)):
+    deleted = await write(crud.delete_application, db, application_id=application_id)
+    if deleted is None:
         raise HTTPException(404, detail="Application not found")
-    crud.delete_application(db=db, application_id=application_id)
 
 
 @app.get(
@@ -407,6 +954,174 @@ def delete_application(application_id: int, db: Session = Depends(get_db)):
     status_code=200,
     description="Get all notifications",
 )
-def read_notifications(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    notifications = crud.get_notifications(db, skip=skip, limit=limit)
-    return notifications
+async def read_notifications(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: pagination.Cursor | None = Depends(get_cursor),
+    projection: projections.Projection = Depends(projection_of(schema.Notification)),
+    db: Session = Depends(get_read_db),
+):
+    not_modified = await check_collection(request, response, db, "notifications")
+    if not_modified is not None:
+        return not_modified
+    notifications = await run(
+        crud.get_notifications,
+        db,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        options=projection.options,
+    )
+    set_next_cursor(response, notifications, limit)
+    return serializers.json_list_response(
+        schema.Notification, notifications, response, projection.fields
+    )
+
+
+@app.get(
+    "/notifications/stream",
+    tags=["notifications"],
+    status_code=200,
+    description="Stream new notifications as Server-Sent Events",
+    response_class=StreamingResponse,
+)
+async def stream_notifications(request: Request, last_id: int | None = None):
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_id is None and last_event_id.isdigit():
+        last_id = int(last_event_id)
+    subscription = notifications.feed.subscribe()
+
+    async def events():
+        try:
+            async for notification in subscription.events(last_id):
+                if notification is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield (
+                        f"id: {notification[0]}\nevent: notification\n"
+                        f"data: {notification[1]}\n\n"
+                    )
+        finally:
+            notifications.feed.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@app.websocket("/notifications/ws")
+async def notifications_websocket(websocket: WebSocket, last_id: int | None = None):
+    await websocket.accept()
+    subscription = notifications.feed.subscribe()
+    try:
+        async for notification in subscription.events(last_id):
+            if notification is None:
+                await websocket.send_text('{"type": "keepalive"}')
+            else:
+                await websocket.send_text(
+                    f'{{"type": "notification", "id": {notification[0]}, '
+                    f'"notification": {notification[1]}}}'
+                )
+    except WebSocketDisconnect:
+        pass
+    finally:
+        notifications.feed.unsubscribe(subscription)
+
+
+@app.get(
+    "/notifications/retention",
+    tags=["notifications"],
+    status_code=200,
+    description="Get the result of the last notification retention run",
+)
+async def read_notification_retention():
+    return {
+        "enabled": retention.is_enabled(),
+        "maxAgeDays": retention.NOTIFICATION_MAX_AGE_DAYS,
+        "maxRows": retention.NOTIFICATION_MAX_ROWS,
+        "lastRun": retention.last_run or None,
+    }
+
+
+@app.get(
+    "/notifications/archive",
+    tags=["notifications"],
+    status_code=200,
+    description="Stream archived notifications created in [start, end) as NDJSON",
+    response_class=StreamingResponse,
+)
+async def read_notification_archive(start: datetime, end: datetime):
+    if not retention.NOTIFICATION_ARCHIVE_DIR:
+        raise HTTPException(404, detail="Notification archive is not enabled")
+    records = retention.query_archive(
+        start.replace(tzinfo=None), end.replace(tzinfo=None)
+    )
+    return StreamingResponse(
+        (json.dumps(record) + "\n" for record in records),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.get(
+    "/export/{entity}",
+    tags=["export"],
+    status_code=200,
+    description="Stream a collection as NDJSON or CSV",
+    response_class=StreamingResponse,
+)
+async def export_collection(
+    entity: ExportEntity,
+    format: ExportFormat = ExportFormat.NDJSON,
+    job_id: int | None = None,
+):
+    if DATABASE_ASYNC:
+        rows = export_rows_async(entity, format, job_id=job_id)
+    else:
+        rows = export_rows(entity, format, job_id=job_id)
+    return StreamingResponse(
+        rows,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{entity.value}.{format.value}"'
+        },
+    )
+
+
+@app.post(
+    "/import/applicants",
+    response_model=schema.ImportProgress,
+    tags=["import"],
+    status_code=200,
+    description="Import applicants and resumes from an NDJSON or CSV upload",
+)
+async def import_applicants(
+    request: Request,
+    format: importer.ImportFormat = importer.ImportFormat.NDJSON,
+    start: int = 0,
+    import_id: str | None = None,
+):
+    progress = importer.start_import(start, import_id)
+    await run_in_threadpool(
+        lambda: importer.import_lines(
+            importer.request_lines(request.stream()), format, progress
+        )
+    )
+    return progress
+
+
+@app.get(
+    "/import/{import_id}",
+    response_model=schema.ImportProgress,
+    tags=["import"],
+    status_code=200,
+    description="Get the progress of an import",
+)
+async def read_import(import_id: str):
+    progress = importer.imports.get(import_id)
+    if progress is None:
+        raise HTTPException(404, detail="Import not found")
+    return progress
@@ -0,0 +1,248 @@
+"""
+Request, threadpool, connection pool and SQL metrics in the Prometheus text
+format, collected in process without a client library.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+
+import anyio.to_thread
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+POOL_WAIT_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def samples(self, name: str, labels: str):
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        separator = "," if labels else ""
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {total}"
+        yield f"{name}_count{{{labels}}} {cumulative}"
+
+
+class RequestStats:
+    __slots__ = ("statements",)
+
+    def __init__(self):
+        self.statements = 0
+
+
+# Stats of the request being handled. Worker threads and greenlets started
+# for the request see the same object through the copied context.
+current_request: contextvars.ContextVar[RequestStats | None] = contextvars.ContextVar(
+    "current_request", default=None
+)
+
+_lock = threading.Lock()
+requests: dict[tuple[str, str, int], int] = {}
+latency: dict[tuple[str, str], Histogram] = {}
+statements: dict[tuple[str, str], Histogram] = {}
+in_flight: dict[str, int] = {}
+pools: dict[str, tuple[Engine, Histogram]] = {}
+
+
+def _labels(**labels) -> str:
+    return ",".join(
+        f'{key}="{str(value).replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in labels.items()
+    )
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    if stats is not None:
+        stats.statements += 1
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Count the statements each request executes on engine and time how long
+    connection checkouts from its pool wait.
+    """
+
+    event.listen(engine, "before_cursor_execute", _count_statement)
+    wait = Histogram(POOL_WAIT_BUCKETS)
+    pool = engine.pool
+    do_get = pool._do_get
+
+    # The pool has no event for the start of a checkout, the method that
+    # blocks until a connection is available is timed instead.
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            wait.observe(time.perf_counter() - started)
+
+    pool._do_get = timed_do_get
+    pools[name] = (engine, wait)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the count, latency and SQL statements of every
+    HTTP request by route template.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+        stats = RequestStats()
+        token = current_request.set(stats)
+        # The route is only known once the router has matched the request.
+        with _lock:
+            in_flight[method] = in_flight.get(method, 0) + 1
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            route = scope.get("route")
+            route = route.path if route is not None else UNMATCHED_ROUTE
+            key = (method, route)
+            with _lock:
+                in_flight[method] -= 1
+                requests[(method, route, status)] = (
+                    requests.get((method, route, status), 0) + 1
+                )
+                if key not in latency:
+                    latency[key] = Histogram(LATENCY_BUCKETS)
+                    statements[key] = Histogram(STATEMENT_BUCKETS)
+            latency[key].observe(elapsed)
+            statements[key].observe(stats.statements)
+
+
+def _family(name: str, kind: str, description: str):
+    yield f"# HELP {name} {description}"
+    yield f"# TYPE {name} {kind}"
+
+
+def render() -> str:
+    """
+    All metrics in the Prometheus text exposition format. Must be called
+    from the event loop thread.
+    """
+
+    lines = []
+    with _lock:
+        request_counts = dict(requests)
+        histograms = [(key, latency[key], statements[key]) for key in latency]
+        in_flight_counts = dict(in_flight)
+
+    lines += _family(
+        "workly_http_requests_total", "counter", "HTTP requests by route and status"
+    )
+    for (method, route, status), count in sorted(request_counts.items()):
+        labels = _labels(method=method, route=route, status=status)
+        lines.append(f"workly_http_requests_total{{{labels}}} {count}")
+
+    lines += _family(
+        "workly_http_request_duration_seconds",
+        "histogram",
+        "HTTP request latency by route",
+    )
+    for (method, route), histogram, _ in sorted(histograms, key=lambda h: h[0]):
+        lines += histogram.samples(
+            "workly_http_request_duration_seconds", _labels(method=method, route=route)
+        )
+
+    lines += _family(
+        "workly_http_request_sql_statements",
+        "histogram",
+        "SQL statements executed per HTTP request by route",
+    )
+    for (method, route), _, histogram in sorted(histograms, key=lambda h: h[0]):
+        lines += histogram.samples(
+            "workly_http_request_sql_statements", _labels(method=method, route=route)
+        )
+
+    lines += _family(
+        "workly_http_requests_in_flight", "gauge", "HTTP requests being handled"
+    )
+    for method, count in sorted(in_flight_counts.items()):
+        lines.append(
+            f"workly_http_requests_in_flight{{{_labels(method=method)}}} {count}"
+        )
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    lines += _family("workly_threadpool_threads_busy", "gauge", "Worker threads in use")
+    lines.append(f"workly_threadpool_threads_busy {limiter.borrowed_tokens}")
+    lines += _family(
+        "workly_threadpool_threads_max", "gauge", "Maximum number of worker threads"
+    )
+    lines.append(f"workly_threadpool_threads_max {limiter.total_tokens}")
+    lines += _family(
+        "workly_threadpool_tasks_waiting",
+        "gauge",
+        "Calls waiting for a free worker thread",
+    )
+    lines.append(
+        f"workly_threadpool_tasks_waiting {limiter.statistics().tasks_waiting}"
+    )
+
+    gauges = {
+        "size": ("Connections the pool keeps open", "size"),
+        "checked_out": ("Connections in use", "checkedout"),
+        "checked_in": ("Idle connections in the pool", "checkedin"),
+        "overflow": (
+            "Connections beyond the pool size, negative while the pool is not full",
+            "overflow",
+        ),
+    }
+    for gauge, (description, method) in gauges.items():
+        name = f"workly_db_pool_{gauge}"
+        lines += _family(name, "gauge", description)
+        for engine_name, (engine, _) in sorted(pools.items()):
+            value = getattr(engine.pool, method, None)
+            if callable(value):
+                lines.append(f"{name}{{{_labels(engine=engine_name)}}} {value()}")
+
+    lines += _family(
+        "workly_db_pool_checkout_wait_seconds",
+        "histogram",
+        "Time spent waiting for a connection from the pool",
+    )
+    for engine_name, (_, wait) in sorted(pools.items()):
+        lines += wait.samples(
+            "workly_db_pool_checkout_wait_seconds", _labels(engine=engine_name)
+        )
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,127 @@
+"""
+Versioned schema migrations for databases created before a change to
+models.py. New databases get the current schema from create_all, every
+migration is written so it is a no-op on them and is only recorded.
+"""
+
+import logging
+from datetime import datetime
+
+from sqlalchemy import Index
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+
+def _indexes(*names: str):
+    def migrate(db: Session) -> None:
+        indexes = {
+            index.name: index
+            for table in models.Base.metadata.tables.values()
+            for index in table.indexes
+        }
+        for name in names:
+            index: Index = indexes[name]
+            index.create(db.connection(), checkfirst=True)
+
+    return migrate
+
+
+def _timestamps(*tables: str):
+    # SQLAlchemy stores DateTime columns as "YYYY-MM-DD HH:MM:SS.ffffff" and
+    # compares them as strings. Rows written by SQL, like the notifications of
+    # the first version of the job trigger, have no or fewer fraction digits
+    # and sort before the cursors of their own second.
+    def migrate(db: Session) -> None:
+        for table in tables:
+            for column in ("created_at", "updated_at"):
+                db.execute(
+                    text(
+                        f"""\
+UPDATE {table}
+SET {column} = replace(substr({column}, 1, 19), 'T', ' ') || '.'
+    || substr(substr({column}, 21) || '000000', 1, 6)
+WHERE length({column}) <> 26 OR substr({column}, 11, 1) = 'T';"""
+                    )
+                )
+
+    return migrate
+
+
+# Version, description and the function applying it, in order.
+MIGRATIONS = (
+    (
+        1,
+        "Index hot filters and sorts",
+        _indexes(
+            "ix_employers_created_at_id",
+            "ix_jobs_created_at_id",
+            "ix_jobs_employer_id",
+            "ix_applicants_created_at_id",
+            "ix_resumes_applicant_id_created_at_id",
+            "ix_applications_job_id_created_at_id",
+            "ix_applications_resume_id",
+            "ix_notifications_created_at_id",
+            "ix_notifications_job_id",
+        ),
+    ),
+    (
+        2,
+        "Store timestamps with microseconds",
+        _timestamps(
+            "employers",
+            "jobs",
+            "applicants",
+            "resumes",
+            "applications",
+            "notifications",
+        ),
+    ),
+)
+
+
+def current_version(db: Session) -> int:
+    return db.execute(text("SELECT MAX(version) FROM schema_migrations")).scalar() or 0
+
+
+def migrate(db: Session) -> int:
+    """
+    Apply the migrations newer than the database's version, each in its own
+    transaction. Returns the version the database is at.
+    """
+
+    db.execute(
+        text(
+            """\
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    description VARCHAR(200) NOT NULL,
+    applied_at DATETIME NOT NULL
+);"""
+        )
+    )
+    db.commit()
+
+    version = current_version(db)
+    for number, description, apply in MIGRATIONS:
+        if number <= version:
+            continue
+        apply(db)
+        db.execute(
+            text(
+                "INSERT INTO schema_migrations (version, description, applied_at) "
+                "VALUES (:version, :description, :applied_at)"
+            ),
+            {
+                "version": number,
+                "description": description,
+                "applied_at": datetime.now(),
+            },
+        )
+        db.commit()
+        logger.info("Applied migration %d: %s", number, description)
+        version = number
+    return version
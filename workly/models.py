@@ -2,7 +2,15 @@ import enum
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import CheckConstraint, DateTime, Enum, ForeignKey, Integer, String
+from sqlalchemy import (
+    CheckConstraint,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -18,6 +26,7 @@ class Base(DeclarativeBase):
 
 class Employer(Base):
     __tablename__ = "employers"
+    __table_args__ = (Index("ix_employers_created_at_id", "created_at", "id"),)
 
     name: Mapped[str] = mapped_column(String(30))
     email: Mapped[str] = mapped_column(String(50), unique=True, index=True)
@@ -38,7 +47,11 @@ class JobStatus(str, enum.Enum):
 
 class Job(Base):
     __tablename__ = "jobs"
-    __table_args__ = (CheckConstraint("salary > 0", name="check_salary_positive"),)
+    __table_args__ = (
+        CheckConstraint("salary > 0", name="check_salary_positive"),
+        Index("ix_jobs_created_at_id", "created_at", "id"),
+        Index("ix_jobs_employer_id", "employer_id"),
+    )
 
     title: Mapped[str] = mapped_column(String(50))
     description: Mapped[str] = mapped_column(String(500))
@@ -63,6 +76,7 @@ class Job(Base):
 
 class Applicant(Base):
     __tablename__ = "applicants"
+    __table_args__ = (Index("ix_applicants_created_at_id", "created_at", "id"),)
 
     name: Mapped[str] = mapped_column(String(30))
     email: Mapped[str] = mapped_column(String(50), unique=True, index=True)
@@ -78,6 +92,11 @@ class Applicant(Base):
 
 class Resume(Base):
     __tablename__ = "resumes"
+    __table_args__ = (
+        Index(
+            "ix_resumes_applicant_id_created_at_id", "applicant_id", "created_at", "id"
+        ),
+    )
 
     resume: Mapped[str] = mapped_column(String(1000))
     applicant_id: Mapped[int] = mapped_column(ForeignKey("applicants.id"))
@@ -101,6 +120,10 @@ class ApplicationStatus(str, enum.Enum):
 
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        Index("ix_applications_job_id_created_at_id", "job_id", "created_at", "id"),
+        Index("ix_applications_resume_id", "resume_id"),
+    )
 
     cover_letter: Mapped[str] = mapped_column(String(1000))
     status: Mapped[str] = mapped_column(Enum(ApplicationStatus))
@@ -120,6 +143,10 @@ class Application(Base):
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_created_at_id", "created_at", "id"),
+        Index("ix_notifications_job_id", "job_id"),
+    )
 
     message: Mapped[str] = mapped_column(String(1000))
     job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id"))
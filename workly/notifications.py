@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import os
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+
+from . import loaders, models, schema
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_POLL_INTERVAL = float(os.environ.get("NOTIFICATION_POLL_INTERVAL", "1"))
+NOTIFICATION_BACKLOG_LIMIT = 1000
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# An event is a notification id and its JSON encoded response model.
+Event = tuple[int, str]
+
+
+def _encode(notification: models.Notification) -> Event:
+    return (
+        notification.id,
+        schema.Notification.from_orm(notification).json(by_alias=True),
+    )
+
+
+def fetch_after(last_id: int, limit: int = NOTIFICATION_BACKLOG_LIMIT) -> list[Event]:
+    with SessionLocal() as db:
+        notifications = db.scalars(
+            select(models.Notification)
+            .options(*loaders.notification)
+            .where(models.Notification.id > last_id)
+            .order_by(models.Notification.id)
+            .limit(limit)
+        ).all()
+        return [_encode(notification) for notification in notifications]
+
+
+def fetch_last_id() -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(func.max(models.Notification.id))) or 0
+
+
+class Subscription:
+    def __init__(self, feed: "NotificationFeed"):
+        self.feed = feed
+        self.queue: asyncio.Queue[Event | None] = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    def publish(self, event: Event) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # The client is not keeping up, drop it so it reconnects and
+            # resumes from its last event id.
+            self.feed.unsubscribe(self)
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def events(self, last_id: int | None = None, keepalive: float = 15):
+        """
+        Yield events, starting with the ones after last_id if given. Yields
+        None when there has been nothing to send for keepalive seconds.
+        """
+
+        sent = 0
+        if last_id is not None:
+            # Page through the backlog until it is caught up, a client far
+            # behind must not skip the rows past the first page.
+            while True:
+                events = await run_in_threadpool(
+                    fetch_after, last_id, NOTIFICATION_BACKLOG_LIMIT
+                )
+                for event in events:
+                    sent = last_id = event[0]
+                    yield event
+                if len(events) < NOTIFICATION_BACKLOG_LIMIT:
+                    break
+        while True:
+            try:
+                event = await asyncio.wait_for(self.queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if event is None:
+                return
+            if event[0] > sent:
+                yield event
+
+
+class NotificationFeed:
+    """
+    A single change feed per process. One task polls the notifications table
+    for new rows and fans them out to every subscriber, so the number of
+    queries does not grow with the number of connected clients.
+    """
+
+    def __init__(self, interval: float = NOTIFICATION_POLL_INTERVAL):
+        self.interval = interval
+        self.last_id = 0
+        self.subscriptions: set[Subscription] = set()
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscriptions.discard(subscription)
+
+    async def poll(self) -> None:
+        if not self.subscriptions:
+            self.last_id = await run_in_threadpool(fetch_last_id)
+            return
+        events = await run_in_threadpool(fetch_after, self.last_id)
+        for event in events:
+            for subscription in list(self.subscriptions):
+                subscription.publish(event)
+        if events:
+            self.last_id = events[-1][0]
+
+    async def run(self) -> None:
+        self.last_id = await run_in_threadpool(fetch_last_id)
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception("Polling notifications failed")
+
+
+feed = NotificationFeed()
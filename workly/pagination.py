@@ -0,0 +1,62 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+
+class Cursor(NamedTuple):
+    created_at: datetime
+    id: int
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    token = f"{created_at.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(token).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    """
+    Decode an opaque cursor token. Raises ValueError if the token is malformed.
+    """
+
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return Cursor(datetime.fromisoformat(created_at), int(id))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def paginate(
+    query: Query,
+    model,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Cursor | None = None,
+    descending: bool = True,
+) -> Query:
+    """
+    Order a query by (created_at, id) and page it. If a cursor is given, only
+    rows strictly after the cursor are returned, otherwise skip is used.
+    """
+
+    if cursor is not None:
+        # A row value comparison lets the (created_at, id) index seek straight
+        # to the cursor instead of filtering the rows before it.
+        key = tuple_(model.created_at, model.id)
+        after = tuple_(cursor.created_at, cursor.id)
+        query = query.filter(key < after if descending else key > after)
+    if descending:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at, model.id)
+    return query.offset(skip).limit(limit)
+
+
+def next_cursor(items: list, limit: int) -> str | None:
+    if not items or len(items) < limit:
+        return None
+    return encode_cursor(items[-1].created_at, items[-1].id)
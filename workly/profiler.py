@@ -0,0 +1,199 @@
+"""
+Opt-in per-request SQL profiling.
+
+With SQL_PROFILE set, every response carries a Server-Timing header with the
+number of statements the request executed and the time spent in them, and
+requests that execute more statements than their route's budget are logged
+with the statements. query_budget() and assert_within_budget() check the
+same budgets from tests.
+"""
+
+import contextvars
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SQL_PROFILE = os.environ.get("SQL_PROFILE", "").lower() in ("1", "true", "yes")
+SQL_QUERY_BUDGET = int(os.environ.get("SQL_QUERY_BUDGET", "10"))
+
+# Statements allowed per request, by method and route template. Lookups and
+# list pages need one statement for the conditional request check and one for
+# the rows. Writes return the row from a single statement plus the nested
+# rows on a cache miss, deletes first delete the rows referencing the row.
+QUERY_BUDGETS = {
+    "GET /employers": 2,
+    "GET /employers/{employer_id}": 2,
+    "GET /jobs": 2,
+    "GET /jobs/{job_id}": 2,
+    "GET /applicants": 2,
+    "GET /applicants/{applicant_id}": 2,
+    "GET /resumes": 2,
+    "GET /resumes/{resume_id}": 2,
+    "GET /applications": 2,
+    "GET /applications/{application_id}": 2,
+    "GET /notifications": 2,
+    "GET /jobs/{job_id}/applications/counts": 1,
+    "GET /employers/{employer_id}/applications/counts": 1,
+    "POST /employers": 1,
+    "POST /applicants": 1,
+    "PUT /employers/{employer_id}": 1,
+    "PUT /applicants/{applicant_id}": 1,
+    "PUT /jobs/{job_id}": 2,
+    "PUT /resumes/{resume_id}": 2,
+    "PUT /applications/{application_id}": 3,
+    "PUT /employers/upsert": 2,
+    "PUT /applicants/upsert": 2,
+    "DELETE /employers/{employer_id}": 4,
+    "DELETE /jobs/{job_id}": 3,
+    "DELETE /applicants/{applicant_id}": 3,
+    "DELETE /resumes/{resume_id}": 2,
+    "DELETE /applications/{application_id}": 1,
+}
+# Budgets as "GET /jobs=3,PUT /jobs/{job_id}=2".
+for budget in filter(None, os.environ.get("SQL_QUERY_BUDGETS", "").split(",")):
+    route, _, limit = budget.rpartition("=")
+    QUERY_BUDGETS[route.strip()] = int(limit)
+
+
+def budget_for(method: str, route: str) -> int:
+    return QUERY_BUDGETS.get(f"{method} {route}", SQL_QUERY_BUDGET)
+
+
+class Profile:
+    __slots__ = ("statements", "duration", "_started")
+
+    def __init__(self):
+        self.statements: list[tuple[str, float]] = []
+        self.duration = 0.0
+
+
+current_profile: contextvars.ContextVar[Profile | None] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is not None:
+        profile._started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is not None:
+        duration = time.perf_counter() - profile._started
+        profile.statements.append((statement, duration))
+        profile.duration += duration
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def server_timing(profile: Profile) -> str:
+    return (
+        f'db;dur={profile.duration * 1000:.2f};desc="{len(profile.statements)} '
+        f'statements"'
+    )
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware adding the Server-Timing header and logging requests over
+    their query budget.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = Profile()
+        token = current_profile.set(profile)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", server_timing(profile).encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_profile.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                budget = budget_for(scope["method"], route.path)
+                if len(profile.statements) > budget:
+                    logger.warning(
+                        "%s %s executed %d statements, budget %d:\n%s",
+                        scope["method"],
+                        route.path,
+                        len(profile.statements),
+                        budget,
+                        "\n".join(
+                            f"  {duration * 1000:.2f}ms {statement}"
+                            for statement, duration in profile.statements
+                        ),
+                    )
+
+
+@contextmanager
+def query_budget(budget: int, engine: Engine | None = None):
+    """
+    For tests: fail with the executed statements if the block executes more
+    than budget statements on engine (every engine by default, reads may go
+    to a replica). Yields the list of statements executed so far.
+    """
+
+    engine = engine or Engine
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    if len(statements) > budget:
+        raise AssertionError(
+            f"{len(statements)} statements executed, budget {budget}:\n"
+            + "\n".join(statements)
+        )
+
+
+def assert_within_budget(client, method: str, url: str, **kwargs):
+    """
+    For tests: send a request with a Starlette TestClient and fail if it
+    executes more statements than the budget of the route it matches.
+    Returns the response.
+
+        def test_read_job_budget(client):
+            assert_within_budget(client, "GET", "/jobs/1")
+    """
+
+    path = url.split("?", 1)[0]
+    route = next(
+        (
+            route.path
+            for route in client.app.routes
+            if method in getattr(route, "methods", ()) and route.path_regex.match(path)
+        ),
+        None,
+    )
+    assert route is not None, f"no route matches {method} {path}"
+    with query_budget(budget_for(method, route)):
+        return client.request(method, url, **kwargs)
@@ -0,0 +1,86 @@
+"""
+Sparse fieldsets for list responses.
+
+A list route can be asked for a subset of its response model's fields,
+either by name with fields=jobId,title or with the predefined view=summary.
+Only the columns of the requested fields are selected and nested objects are
+only joined when they are requested.
+"""
+
+import enum
+from typing import NamedTuple
+
+from pydantic import BaseModel
+from sqlalchemy.orm import load_only
+
+from . import loaders, models, schema
+
+
+class View(str, enum.Enum):
+    FULL = "full"
+    SUMMARY = "summary"
+
+
+class Projection(NamedTuple):
+    # Field names of the response model to return, None for all of them.
+    fields: tuple[str, ...] | None
+    # Loader options for the query reading the rows.
+    options: tuple
+
+
+# ORM model and eager loading options of each nested field, per response
+# model of a list route.
+LISTS = {
+    schema.Job: (models.Job, {"employer": loaders.job}),
+    schema.Resume: (models.Resume, {"applicant": loaders.resume}),
+    schema.Application: (
+        models.Application,
+        {"job": loaders.application_job, "resume": loaders.application_resume},
+    ),
+    schema.Notification: (models.Notification, {"job": loaders.notification}),
+}
+
+# Fields of the summary view, without the long text columns and the nested
+# objects.
+SUMMARIES = {
+    schema.Job: ("id", "title", "location", "salary", "status", "created_at"),
+    schema.Resume: ("id", "created_at", "updated_at"),
+    schema.Application: ("id", "status", "created_at", "updated_at"),
+    schema.Notification: ("message",),
+}
+
+
+def project(response_model: type[BaseModel], view: View, fields: str) -> Projection:
+    """
+    The projection of a list of response_model for the fields and view query
+    parameters. fields holds comma-separated field aliases and takes
+    precedence over view. Raises ValueError for an unknown field.
+    """
+
+    model, nested = LISTS[response_model]
+    if fields:
+        aliases = {
+            field.alias: name for name, field in response_model.__fields__.items()
+        }
+        names = []
+        for alias in filter(None, (alias.strip() for alias in fields.split(","))):
+            if alias not in aliases:
+                raise ValueError(f"Unknown field: {alias}")
+            names.append(aliases[alias])
+    elif view == View.SUMMARY:
+        names = SUMMARIES[response_model]
+    else:
+        return Projection(
+            None, tuple(option for loads in nested.values() for option in loads)
+        )
+
+    # Keyset pagination reads created_at and id from every row.
+    columns = dict.fromkeys(("id", "created_at", *names))
+    options = (
+        load_only(*(getattr(model, name) for name in columns if name not in nested)),
+    )
+    for name in columns:
+        options += nested.get(name, ())
+    return Projection(
+        tuple(name for name in response_model.__fields__ if name in names), options
+    )
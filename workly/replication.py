@@ -0,0 +1,189 @@
+"""
+Read replicas and read-your-writes.
+
+GET routes read from the engines of DATABASE_REPLICA_URLS in turn, writes go
+to the primary. A replica can be a read-only URI of the primary file itself
+(sqlite:///file:workly.db?mode=ro&uri=true), which gives reads their own
+connections, or a copy of it, which is refreshed from the primary with the
+SQLite backup API every REPLICA_REFRESH_INTERVAL seconds. A refresh copies the
+whole database, it is skipped when nothing was committed since the last one.
+
+Successful writes return an X-Commit-Token header: the number of row changes
+the primary had committed. A client sending it back on a read is served by a
+replica that has caught up with it, or by the primary if none has.
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import sqlite3
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+
+from .database import DATABASE_URL, SessionLocal, replica_engines
+
+logger = logging.getLogger(__name__)
+
+REPLICA_REFRESH_INTERVAL = float(os.environ.get("REPLICA_REFRESH_INTERVAL", "60"))
+
+COMMIT_TOKEN_HEADER = "X-Commit-Token"
+
+_turn = itertools.count()
+
+# Commit token of the primary when the replica files were last copied.
+_copied_token: int | None = None
+
+
+def is_enabled() -> bool:
+    return bool(replica_engines)
+
+
+def commit_token(db: Session) -> int:
+    """
+    The number of row changes committed to the versioned tables, counted by
+    the collection version triggers.
+    """
+
+    return db.execute(
+        text("SELECT COALESCE(SUM(version), 0) FROM collection_versions")
+    ).scalar()
+
+
+def caught_up(db: Session, token: int) -> bool:
+    try:
+        return commit_token(db) >= token
+    except OperationalError:
+        # Not copied from the primary yet.
+        return False
+
+
+def requested_token(request: Request) -> int | None:
+    token = request.headers.get(COMMIT_TOKEN_HEADER)
+    try:
+        return int(token) if token is not None else None
+    except ValueError:
+        return None
+
+
+def replica_order(factories: list) -> list:
+    """
+    The replica session factories, starting with the next one in turn.
+    """
+
+    if not factories:
+        return []
+    start = next(_turn) % len(factories)
+    return factories[start:] + factories[:start]
+
+
+def _database_file(url: str) -> str | None:
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite" or not url.database:
+        return None
+    path = url.database
+    if url.query.get("uri") == "true":
+        path = path.removeprefix("file:").split("?", 1)[0]
+    if path == ":memory:":
+        return None
+    return os.path.abspath(path)
+
+
+def replica_files() -> list[str]:
+    """
+    Files of the replicas that are copies of the primary.
+    """
+
+    primary = _database_file(DATABASE_URL)
+    return [
+        path
+        for path in (_database_file(str(engine.url)) for engine in replica_engines)
+        if path is not None and path != primary
+    ]
+
+
+def refresh_replicas() -> bool:
+    """
+    Copy the primary into every replica file, unless its commit token has not
+    changed since the last copy. The copy is staged in a temporary file
+    switched to rollback journal mode, so read-only connections can open the
+    replica at any point. Returns whether the replicas were copied.
+    """
+
+    global _copied_token
+
+    primary = sqlite3.connect(_database_file(DATABASE_URL))
+    try:
+        try:
+            # Read before the copy, a write in between only causes another one.
+            token = primary.execute(
+                "SELECT COALESCE(SUM(version), 0) FROM collection_versions"
+            ).fetchone()[0]
+        except sqlite3.OperationalError:
+            token = None
+        if token is not None and token == _copied_token:
+            return False
+        for path in replica_files():
+            staged = sqlite3.connect(f"{path}.refresh")
+            try:
+                primary.backup(staged)
+                staged.execute("PRAGMA journal_mode=DELETE;")
+                replica = sqlite3.connect(path, timeout=30)
+                try:
+                    staged.backup(replica)
+                finally:
+                    replica.close()
+            finally:
+                staged.close()
+                os.remove(f"{path}.refresh")
+    finally:
+        primary.close()
+    _copied_token = token
+    return True
+
+
+async def refresh_loop(interval: float = REPLICA_REFRESH_INTERVAL, run=None) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if run is None:
+                await run_in_threadpool(refresh_replicas)
+            else:
+                await run_in_threadpool(run, refresh_replicas)
+        except Exception:
+            logger.exception("Refreshing the read replicas failed")
+
+
+def primary_commit_token() -> int:
+    with SessionLocal() as db:
+        return commit_token(db)
+
+
+class CommitTokenMiddleware:
+    """
+    ASGI middleware adding the primary's commit token to the response of
+    every successful write.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            return await self.app(scope, receive, send)
+
+        async def send_with_token(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                token = await run_in_threadpool(primary_commit_token)
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (COMMIT_TOKEN_HEADER.lower().encode(), str(token).encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_token)
@@ -0,0 +1,167 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, select, true
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_MAX_AGE_DAYS = float(os.environ.get("NOTIFICATION_MAX_AGE_DAYS", "0"))
+NOTIFICATION_MAX_ROWS = int(os.environ.get("NOTIFICATION_MAX_ROWS", "0"))
+NOTIFICATION_ARCHIVE_DIR = os.environ.get("NOTIFICATION_ARCHIVE_DIR", "")
+NOTIFICATION_RETENTION_INTERVAL = float(
+    os.environ.get("NOTIFICATION_RETENTION_INTERVAL", "3600")
+)
+RETENTION_BATCH_SIZE = 500
+# Pause between batches so writers waiting on the lock get a turn.
+RETENTION_BATCH_PAUSE = 0.05
+
+last_run: dict = {}
+
+
+def is_enabled() -> bool:
+    return NOTIFICATION_MAX_AGE_DAYS > 0 or NOTIFICATION_MAX_ROWS > 0
+
+
+def _archive_path(directory: str, month: str) -> str:
+    return os.path.join(directory, f"notifications-{month}.ndjson.gz")
+
+
+def archive(notifications: list[models.Notification], directory: str) -> None:
+    """
+    Append notifications to monthly gzip files. Every call adds a new gzip
+    member to the end of the file, existing data is never rewritten.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    by_month: dict[str, list[str]] = {}
+    for notification in notifications:
+        record = {
+            "id": notification.id,
+            "message": notification.message,
+            "job_id": notification.job_id,
+            "created_at": notification.created_at.isoformat(),
+            "updated_at": notification.updated_at.isoformat(),
+        }
+        month = notification.created_at.strftime("%Y-%m")
+        by_month.setdefault(month, []).append(json.dumps(record) + "\n")
+    for month, lines in by_month.items():
+        with gzip.open(_archive_path(directory, month), "at") as f:
+            f.writelines(lines)
+
+
+def query_archive(
+    start: datetime, end: datetime, directory: str = NOTIFICATION_ARCHIVE_DIR
+):
+    """
+    Yield archived notifications created in [start, end), only reading the
+    monthly files that overlap the range.
+    """
+
+    month = datetime(start.year, start.month, 1)
+    while month < end:
+        path = _archive_path(directory, month.strftime("%Y-%m"))
+        if os.path.exists(path):
+            with gzip.open(path, "rt") as f:
+                for line in f:
+                    record = json.loads(line)
+                    created_at = datetime.fromisoformat(record["created_at"])
+                    if start <= created_at < end:
+                        yield record
+        month = (month + timedelta(days=32)).replace(day=1)
+
+
+def _remove_batch(db: Session, condition, limit: int, archive_dir: str) -> int:
+    notifications = db.scalars(
+        select(models.Notification)
+        .where(condition)
+        .order_by(models.Notification.created_at, models.Notification.id)
+        .limit(limit)
+    ).all()
+    if not notifications:
+        return 0
+    if archive_dir:
+        archive(notifications, archive_dir)
+    db.execute(
+        delete(models.Notification).where(
+            models.Notification.id.in_([n.id for n in notifications])
+        )
+    )
+    db.commit()
+    db.expunge_all()
+    return len(notifications)
+
+
+def _remove_batch_in_session(condition, limit: int, archive_dir: str) -> int:
+    with SessionLocal() as db:
+        return _remove_batch(db, condition, limit, archive_dir)
+
+
+def prune(
+    max_age_days: float = NOTIFICATION_MAX_AGE_DAYS,
+    max_rows: int = NOTIFICATION_MAX_ROWS,
+    archive_dir: str = NOTIFICATION_ARCHIVE_DIR,
+    batch_size: int = RETENTION_BATCH_SIZE,
+    run=None,
+) -> int:
+    """
+    Remove notifications older than max_age_days and the oldest ones beyond
+    max_rows, archiving them first if archive_dir is set. Every batch is its
+    own short transaction, run through run(fn, *args) if given (the writer
+    process runs them on its writer thread). Returns the number of rows removed.
+    """
+
+    started = time.perf_counter()
+    removed = 0
+    with SessionLocal() as db:
+
+        def remove(condition, limit: int) -> int:
+            if run is None:
+                return _remove_batch(db, condition, limit, archive_dir)
+            return run(_remove_batch_in_session, condition, limit, archive_dir)
+
+        if max_age_days > 0:
+            cutoff = datetime.now() - timedelta(days=max_age_days)
+            condition = models.Notification.created_at < cutoff
+            while count := remove(condition, batch_size):
+                removed += count
+                time.sleep(RETENTION_BATCH_PAUSE)
+
+        if max_rows > 0:
+            excess = db.scalar(select(func.count(models.Notification.id))) - max_rows
+            while excess > 0:
+                count = remove(true(), min(batch_size, excess))
+                if not count:
+                    break
+                removed += count
+                excess -= count
+                time.sleep(RETENTION_BATCH_PAUSE)
+
+    last_run.update(
+        finishedAt=datetime.now().isoformat(),
+        removed=removed,
+        archived=bool(archive_dir),
+        duration=time.perf_counter() - started,
+    )
+    logger.info("Notification retention removed %d rows", removed)
+    return removed
+
+
+async def retention_loop(
+    interval: float = NOTIFICATION_RETENTION_INTERVAL, run=None
+) -> None:
+    while True:
+        try:
+            await run_in_threadpool(prune, run=run)
+        except Exception:
+            logger.exception("Notification retention failed")
+        await asyncio.sleep(interval)
@@ -147,3 +147,43 @@ class Notification(BaseModel):
     class Config:
         orm_mode = True
         allow_population_by_field_name = True
+
+
+class ApplicationCounts(BaseModel):
+    pending: int = Field(title="Pending applications", example=3)
+    accepted: int = Field(title="Accepted applications", example=1)
+    rejected: int = Field(title="Rejected applications", example=2)
+    total: int = Field(title="All applications", example=6)
+
+
+class BatchItemResult(BaseModel):
+    index: int = Field(title="Index of the item in the request", example=0)
+    id: int | None = Field(title="ID of the created record", example=1, default=None)
+    error: str | None = Field(title="Why the item was not created", default=None)
+
+
+class BatchResult(BaseModel):
+    created: int = Field(title="Number of records created", example=1)
+    results: list[BatchItemResult] = Field()
+
+
+class ImportRecordError(BaseModel):
+    record: int = Field(title="Record number in the upload", example=1)
+    error: str = Field(title="Why the record was rejected")
+
+
+class ImportProgress(BaseModel):
+    import_id: str = Field(alias="importId", title="Import ID")
+    processed: int = Field(title="Records read so far", default=0)
+    imported: int = Field(title="Applicants created", default=0)
+    resumes: int = Field(title="Resumes created", default=0)
+    duplicates: int = Field(title="Records skipped as already registered", default=0)
+    failed: int = Field(title="Records that failed validation", default=0)
+    checkpoint: int = Field(
+        title="Records committed, pass as start to resume the import", default=0
+    )
+    done: bool = Field(default=False)
+    errors: list[ImportRecordError] = Field(default=[])
+
+    class Config:
+        allow_population_by_field_name = True
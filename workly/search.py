@@ -0,0 +1,171 @@
+import re
+
+from sqlalchemy import bindparam, column, literal_column, select, table
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+
+JOBS_FTS_TABLE = "jobs_fts"
+
+jobs_fts = table(JOBS_FTS_TABLE, column("rowid"), column("rank"))
+
+_enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _index_exists(db: Session) -> bool:
+    return (
+        db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": JOBS_FTS_TABLE},
+        ).first()
+        is not None
+    )
+
+
+def detect_search_index(db: Session) -> bool:
+    """
+    Enable searches through the index if another process has created it, for
+    processes that cannot run the DDL of create_search_index.
+    """
+
+    global _enabled
+
+    _enabled = db.get_bind().dialect.name == "sqlite" and _index_exists(db)
+    return _enabled
+
+
+def create_search_index(db: Session) -> bool:
+    """
+    Create the FTS5 job search index and the triggers that keep it in sync with
+    the jobs and employers tables. The index is backfilled the first time it is
+    created. Returns False if the database does not support FTS5.
+    """
+
+    global _enabled
+
+    if db.get_bind().dialect.name != "sqlite":
+        _enabled = False
+        return _enabled
+
+    exists = _index_exists(db)
+
+    try:
+        db.execute(
+            text(
+                f"""\
+CREATE VIRTUAL TABLE IF NOT EXISTS {JOBS_FTS_TABLE} USING fts5(
+    title, description, location, employer
+);"""
+            )
+        )
+    except OperationalError:
+        db.rollback()
+        _enabled = False
+        return _enabled
+
+    db.execute(
+        text(
+            f"""\
+CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs
+FOR EACH ROW
+BEGIN
+    INSERT INTO {JOBS_FTS_TABLE} (rowid, title, description, location, employer)
+    VALUES (
+        NEW.id,
+        NEW.title,
+        NEW.description,
+        NEW.location,
+        (SELECT name FROM employers WHERE id = NEW.employer_id)
+    );
+END;"""
+        )
+    )
+    db.execute(
+        text(
+            f"""\
+CREATE TRIGGER IF NOT EXISTS jobs_fts_update AFTER UPDATE ON jobs
+FOR EACH ROW
+BEGIN
+    DELETE FROM {JOBS_FTS_TABLE} WHERE rowid = OLD.id;
+    INSERT INTO {JOBS_FTS_TABLE} (rowid, title, description, location, employer)
+    VALUES (
+        NEW.id,
+        NEW.title,
+        NEW.description,
+        NEW.location,
+        (SELECT name FROM employers WHERE id = NEW.employer_id)
+    );
+END;"""
+        )
+    )
+    db.execute(
+        text(
+            f"""\
+CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs
+FOR EACH ROW
+BEGIN
+    DELETE FROM {JOBS_FTS_TABLE} WHERE rowid = OLD.id;
+END;"""
+        )
+    )
+    db.execute(
+        text(
+            f"""\
+CREATE TRIGGER IF NOT EXISTS jobs_fts_employer_update AFTER UPDATE OF name ON employers
+FOR EACH ROW
+BEGIN
+    UPDATE {JOBS_FTS_TABLE} SET employer = NEW.name
+    WHERE rowid IN (SELECT id FROM jobs WHERE employer_id = NEW.id);
+END;"""
+        )
+    )
+
+    if not exists:
+        db.execute(
+            text(
+                f"""\
+INSERT INTO {JOBS_FTS_TABLE} (rowid, title, description, location, employer)
+SELECT jobs.id, jobs.title, jobs.description, jobs.location, employers.name
+FROM jobs JOIN employers ON employers.id = jobs.employer_id;"""
+            )
+        )
+    db.commit()
+
+    _enabled = True
+    return _enabled
+
+
+def _terms(value: str) -> list[str]:
+    return [f'"{term}"*' for term in re.findall(r"\w+", value)]
+
+
+def match_expression(
+    query: str = "", title: str = "", location: str = "", employer: str = ""
+) -> str:
+    """
+    Build an FTS5 MATCH expression. Every word is matched as a prefix, words in
+    the column filters are restricted to that column, and all of them must match.
+    """
+
+    clauses = _terms(query)
+    for name, value in (
+        ("title", title),
+        ("location", location),
+        ("employer", employer),
+    ):
+        clauses.extend(f"{name} : {term}" for term in _terms(value))
+    return " AND ".join(clauses)
+
+
+def match_subquery(expression: str):
+    return (
+        select(jobs_fts.c.rowid.label("job_id"), jobs_fts.c.rank.label("rank"))
+        .where(
+            literal_column(JOBS_FTS_TABLE).op("MATCH")(bindparam("match", expression))
+        )
+        .subquery()
+    )
@@ -1,4 +1,8 @@
-from . import crud, models, schema
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+from . import models
 from .database import SessionLocal
 
 seed_data = {
@@ -110,53 +114,61 @@ seed_data = {
 
 def seed_database(db: SessionLocal) -> None:
     """
-    Seed the database with data if the database is empty.
+    Seed the database with data if the database is empty. All seed rows are
+    inserted in one transaction with one statement per table.
     """
 
-    for employer in seed_data["employers"]:
-        if not crud.get_employer_by_email(db, email=employer["email"]):
-            new_employer = schema.EmployerCreate(
-                name=employer["name"],
-                email=employer["email"],
-                phone=employer["phone"],
-            )
-            crud.create_employer(db, employer=new_employer)
-
-    for job in seed_data["jobs"]:
-        if not crud.get_job(db, job_id=job["id"]):
-            new_job = schema.JobCreate(
-                title=job["title"],
-                description=job["description"],
-                location=job["location"],
-                salary=job["salary"],
-                status=job["status"],
-                employerId=job["employerId"],
-            )
-            crud.create_employer_job(db, job=new_job)
+    if db.scalar(select(models.Employer.id).limit(1)) is not None:
+        return
 
-    for applicant in seed_data["applicants"]:
-        if not crud.get_applicant_by_email(db, email=applicant["email"]):
-            new_applicant = schema.ApplicantCreate(
-                name=applicant["name"],
-                email=applicant["email"],
-                phone=applicant["phone"],
-            )
-            crud.create_applicant(db, applicant=new_applicant)
+    now = datetime.now()
 
-    for resume in seed_data["resumes"]:
-        if not crud.get_resume(db, resume_id=resume["id"]):
-            new_resume = schema.ResumeCreate(
-                applicantId=resume["applicantId"],
-                resume=resume["resume"],
-            )
-            crud.create_applicant_resume(db, resume=new_resume)
+    def rows(name, fields):
+        return [
+            {
+                "id": row.get("id", index),
+                **{column: row[key] for key, column in fields.items()},
+                "created_at": now,
+                "updated_at": now,
+            }
+            for index, row in enumerate(seed_data[name], start=1)
+        ]
 
-    for application in seed_data["applications"]:
-        if not crud.get_application(db, application_id=application["id"]):
-            new_application = schema.ApplicationCreate(
-                jobId=application["jobId"],
-                resumeId=application["resumeId"],
-                coverLetter=application["coverLetter"],
-                status=application["status"],
-            )
-            crud.create_application(db, application=new_application)
+    contact = {"name": "name", "email": "email", "phone": "phone"}
+    tables = (
+        (models.Employer, rows("employers", contact)),
+        (
+            models.Job,
+            rows(
+                "jobs",
+                {
+                    "title": "title",
+                    "description": "description",
+                    "location": "location",
+                    "salary": "salary",
+                    "status": "status",
+                    "employerId": "employer_id",
+                },
+            ),
+        ),
+        (models.Applicant, rows("applicants", contact)),
+        (
+            models.Resume,
+            rows("resumes", {"resume": "resume", "applicantId": "applicant_id"}),
+        ),
+        (
+            models.Application,
+            rows(
+                "applications",
+                {
+                    "coverLetter": "cover_letter",
+                    "status": "status",
+                    "jobId": "job_id",
+                    "resumeId": "resume_id",
+                },
+            ),
+        ),
+    )
+    for model, values in tables:
+        db.execute(insert(model.__table__), values)
+    db.commit()
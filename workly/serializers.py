@@ -0,0 +1,70 @@
+"""
+Fast JSON encoding of list responses.
+
+FastAPI validates every returned ORM object through its response model and
+encodes the result with jsonable_encoder and json.dumps. For lists of nested
+objects that costs more than the query. serializer() compiles a response
+model into a function reading the same attributes straight from the ORM
+object into a dict with the aliased keys, in the order pydantic would emit
+them, and json_list_response() encodes the dicts with orjson. The output is
+byte for byte the JSON the response model produces.
+
+The objects are not validated on this path, it is only used for rows read
+from the database, which satisfy the response models.
+"""
+
+from functools import cache
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+
+@cache
+def serializer(model: type[BaseModel], only: tuple[str, ...] | None = None):
+    """
+    A function turning an object with the attributes of model into the dict
+    model.dict(by_alias=True) would produce, nested models included. With
+    only, the dict holds just the fields of model with those names.
+    """
+
+    fields = []
+    for field in model.__fields__.values():
+        if only is not None and field.name not in only:
+            continue
+        nested = None
+        if isinstance(field.type_, type) and issubclass(field.type_, BaseModel):
+            nested = serializer(field.type_)
+        fields.append((field.alias, field.name, nested))
+    namespace = {"nested": {name: nested for _, name, nested in fields if nested}}
+    items = ", ".join(
+        f"{alias!r}: nested[{name!r}](obj.{name})"
+        if nested
+        else f"{alias!r}: obj.{name}"
+        for alias, name, nested in fields
+    )
+    # A dict display compiled per model is about twice as fast as a loop over
+    # the fields with getattr.
+    exec(f"def serialize(obj):\n    return {{{items}}}", namespace)
+    return namespace["serialize"]
+
+
+def dumps(model: type[BaseModel], items, only: tuple[str, ...] | None = None) -> bytes:
+    serialize = serializer(model, only)
+    return orjson.dumps([serialize(item) for item in items])
+
+
+def json_list_response(
+    model: type[BaseModel],
+    items,
+    response: Response,
+    only: tuple[str, ...] | None = None,
+) -> Response:
+    """
+    The JSON response for a list of items of model, carrying the headers
+    already set on the route's response parameter (ETag, cursor).
+    """
+
+    fast = Response(dumps(model, items, only), media_type="application/json")
+    fast.raw_headers.extend(response.raw_headers)
+    return fast
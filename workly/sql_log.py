@@ -0,0 +1,83 @@
+import atexit
+import logging
+import os
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SQL_LOG_MODE = os.environ.get("SQL_LOG_MODE", "slow").lower()
+SQL_LOG_FILE = os.environ.get("SQL_LOG_FILE", "sql.log")
+SQL_LOG_SAMPLE_RATE = float(os.environ.get("SQL_LOG_SAMPLE_RATE", "0.01"))
+SQL_LOG_SLOW_MS = float(os.environ.get("SQL_LOG_SLOW_MS", "100"))
+SQL_LOG_MAX_BYTES = int(os.environ.get("SQL_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SQL_LOG_BACKUP_COUNT = int(os.environ.get("SQL_LOG_BACKUP_COUNT", "5"))
+
+MODES = ("off", "all", "sampled", "slow")
+
+logger = logging.getLogger("workly.sql")
+logger.propagate = False
+
+_listener = None
+
+
+class _DeferredQueueHandler(QueueHandler):
+    # QueueHandler.prepare() formats the message on the calling thread. Records
+    # are enqueued as-is so formatting happens on the listener thread instead.
+    def prepare(self, record):
+        return record
+
+
+def _should_log(duration_ms: float) -> bool:
+    if SQL_LOG_MODE == "all":
+        return True
+    if SQL_LOG_MODE == "sampled":
+        return random.random() < SQL_LOG_SAMPLE_RATE
+    if SQL_LOG_MODE == "slow":
+        return duration_ms >= SQL_LOG_SLOW_MS
+    return False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["sql_log_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - conn.info["sql_log_start"]) * 1000
+    if _should_log(duration_ms):
+        logger.info("%.2fms %s %r", duration_ms, statement, parameters)
+
+
+def _start_listener():
+    global _listener
+
+    if _listener is not None:
+        return
+    file_handler = RotatingFileHandler(
+        SQL_LOG_FILE, maxBytes=SQL_LOG_MAX_BYTES, backupCount=SQL_LOG_BACKUP_COUNT
+    )
+    file_handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(_DeferredQueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    _listener = QueueListener(log_queue, file_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def setup_sql_logging(engine: Engine) -> None:
+    """
+    Log statements executed on an engine according to SQL_LOG_MODE. Records go
+    through a queue to a background thread that writes a rotating log file.
+    """
+
+    if SQL_LOG_MODE not in MODES:
+        raise ValueError(f"SQL_LOG_MODE must be one of {', '.join(MODES)}")
+    if SQL_LOG_MODE == "off":
+        return
+    _start_listener()
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
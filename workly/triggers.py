@@ -4,6 +4,9 @@ from .database import SessionLocal
 
 
 def create_triggers(db: SessionLocal) -> None:
+    # Timestamps are written in the same format SQLAlchemy uses for DateTime
+    # columns so that keyset pagination can compare them with bound parameters.
+    db.execute(text("DROP TRIGGER IF EXISTS create_applicant_notification;"))
     db.execute(
         text(
             """\
@@ -14,9 +17,53 @@ BEGIN
     VALUES (
         'A new job was posted: ' || NEW.title || ' at ' || (SELECT name FROM employers WHERE id = NEW.employer_id) || ' in ' || NEW.location || '!',
         NEW.id,
-        datetime('now'),
-        datetime('now')
+        strftime('%Y-%m-%d %H:%M:%f000', 'now'),
+        strftime('%Y-%m-%d %H:%M:%f000', 'now')
     );
 END;"""
         )
     )
+
+
+VERSIONED_TABLES = (
+    "employers",
+    "jobs",
+    "applicants",
+    "resumes",
+    "applications",
+    "notifications",
+)
+
+
+def create_version_triggers(db: SessionLocal) -> None:
+    """
+    Keep a version counter per table that is bumped by every insert, update
+    and delete, so list responses can be validated without reading the rows.
+    """
+
+    db.execute(
+        text(
+            """\
+CREATE TABLE IF NOT EXISTS collection_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);"""
+        )
+    )
+    for table in VERSIONED_TABLES:
+        db.execute(
+            text("INSERT OR IGNORE INTO collection_versions (name) VALUES (:name)"),
+            {"name": table},
+        )
+        for operation in ("INSERT", "UPDATE", "DELETE"):
+            db.execute(
+                text(
+                    f"""\
+CREATE TRIGGER IF NOT EXISTS {table}_version_{operation.lower()} AFTER {operation} ON {table}
+FOR EACH ROW
+BEGIN
+    UPDATE collection_versions SET version = version + 1 WHERE name = '{table}';
+END;"""
+                )
+            )
+    db.commit()
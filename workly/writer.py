@@ -0,0 +1,396 @@
+"""
+Single writer for running the API in several worker processes.
+
+SQLite lets one connection write at a time, so uvicorn workers committing on
+their own queue up on the database lock and time out under load. In
+multi-worker mode the workers only read, from read-only connections, and
+send every write to one writer process over a Unix socket: the name of the
+crud function and its arguments. The writer runs the writes that queued up
+while the previous batch committed one after the other in a single
+transaction, each in its own savepoint so a failing write does not undo the
+others, commits the batch once and sends every worker its result.
+
+    python -m workly.writer --workers 4 --host 0.0.0.0 --port 8080
+
+starts the writer and uvicorn with the workers. WRITER_ADDRESS tells the
+workers where the writer listens and WRITER_AUTHKEY, generated at random
+unless it is set, the key they authenticate with before sending anything.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import queue
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+from multiprocessing.connection import Client, Listener
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from . import cache, database, storage
+from .sql_log import setup_sql_logging
+
+logger = logging.getLogger(__name__)
+
+WRITER_ADDRESS = os.environ.get("WRITER_ADDRESS", "")
+WRITER_AUTHKEY = os.environ.get("WRITER_AUTHKEY", "").encode() or None
+WRITER_BATCH_SIZE = int(os.environ.get("WRITER_BATCH_SIZE", "64"))
+
+# Set in the writer process, whose own writes must not go to itself.
+_serving = False
+# The queue of the writer thread, in the writer process.
+_pending: queue.Queue | None = None
+
+
+def is_enabled() -> bool:
+    """
+    Whether this process is a worker sending its writes to the writer.
+    """
+
+    return bool(WRITER_ADDRESS) and not _serving
+
+
+# Connections to the writer not used by a request right now. A connection
+# carries one write at a time.
+_idle: queue.SimpleQueue = queue.SimpleQueue()
+
+
+def call(name: str, *args, **kwargs):
+    """
+    Run the write called name with the arguments on the writer once its batch
+    is committed. Returns its result or raises the exception it raised.
+    """
+
+    try:
+        connection = _idle.get_nowait()
+    except queue.Empty:
+        connection = Client(WRITER_ADDRESS, family="AF_UNIX", authkey=WRITER_AUTHKEY)
+    try:
+        connection.send((name, args, kwargs))
+        ok, result = connection.recv()
+    except BaseException:
+        connection.close()
+        raise
+    _idle.put(connection)
+    if not ok:
+        raise result
+    return result
+
+
+def _writes() -> dict:
+    # Imported here, the modules using call() are imported by them.
+    from . import crud, importer
+
+    def import_batch(db, records, progress):
+        importer.import_batch(db, records, progress)
+        return progress
+
+    writes = {
+        fn.__name__: fn
+        for fn in (
+            crud.create_employer,
+            crud.upsert_employer,
+            crud.update_employer,
+            crud.delete_employer,
+            crud.create_employer_job,
+            crud.update_job,
+            crud.delete_job,
+            crud.create_applicant,
+            crud.upsert_applicant,
+            crud.update_applicant,
+            crud.delete_applicant,
+            crud.create_applicant_resume,
+            crud.update_resume,
+            crud.delete_resume,
+            crud.create_application,
+            crud.update_application,
+            crud.delete_application,
+            crud.create_batch,
+        )
+    }
+    writes["import_batch"] = import_batch
+    return writes
+
+
+class PendingWrite:
+    __slots__ = ("name", "args", "kwargs", "result", "done")
+
+    def __init__(self, name: str, args: tuple, kwargs: dict):
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+        self.result = None
+        self.done = threading.Event()
+
+
+class PendingTask:
+    """
+    A job of the writer process that writes outside of requests, run on the
+    writer thread between two batches.
+    """
+
+    __slots__ = ("fn", "args", "result", "done")
+
+    def __init__(self, fn, args: tuple):
+        self.fn = fn
+        self.args = args
+        self.result = None
+        self.done = threading.Event()
+
+    def run(self) -> None:
+        try:
+            self.result = (True, self.fn(*self.args))
+        except Exception as e:
+            self.result = (False, e)
+        self.done.set()
+
+
+def run_on_writer(fn, *args):
+    """
+    Run fn(*args) on the writer thread, so retention, maintenance and replica
+    refreshes take the database lock in turn with the batches rather than
+    competing with them for it. Returns its result or raises the exception it
+    raised.
+    """
+
+    task = PendingTask(fn, args)
+    _pending.put(task)
+    task.done.wait()
+    ok, result = task.result
+    if not ok:
+        raise result
+    return result
+
+
+def writer_engine() -> Engine:
+    """
+    An engine whose transactions start with BEGIN IMMEDIATE. pysqlite would
+    otherwise open the transaction at the first SAVEPOINT and commit it when
+    that savepoint is released.
+    """
+
+    engine = create_engine(
+        database.DATABASE_URL, connect_args={"check_same_thread": False}
+    )
+    setup_sql_logging(engine)
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        storage.configure_connection(dbapi_connection)
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+
+def commit_batch(engine: Engine, writes: dict, batch: list[PendingWrite]) -> None:
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        for write in batch:
+            # The crud functions commit and roll back their session, which
+            # releases or rolls back its savepoint.
+            with Session(
+                bind=connection,
+                autoflush=False,
+                join_transaction_mode="create_savepoint",
+            ) as db:
+                try:
+                    write.result = (
+                        True,
+                        writes[write.name](db, *write.args, **write.kwargs),
+                    )
+                except Exception as e:
+                    write.result = (False, e)
+        try:
+            transaction.commit()
+        except Exception as e:
+            logger.exception("Committing a batch of %d writes failed", len(batch))
+            # Rows read into the cache during the batch were never committed.
+            cache.backend.clear()
+            for write in batch:
+                write.result = (False, e)
+    for write in batch:
+        write.done.set()
+
+
+def write_loop(engine: Engine, pending: queue.Queue, batch_size: int) -> None:
+    writes = _writes()
+    task = None
+    while True:
+        item = task or pending.get()
+        task = None
+        if isinstance(item, PendingTask):
+            item.run()
+            continue
+        batch = [item]
+        while len(batch) < batch_size:
+            try:
+                item = pending.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, PendingTask):
+                # Run after this batch has committed.
+                task = item
+                break
+            batch.append(item)
+        commit_batch(engine, writes, batch)
+
+
+def handle(connection, pending: queue.Queue) -> None:
+    with connection:
+        while True:
+            try:
+                name, args, kwargs = connection.recv()
+            except (EOFError, OSError):
+                return
+            write = PendingWrite(name, args, kwargs)
+            pending.put(write)
+            write.done.wait()
+            try:
+                connection.send(write.result)
+            except (EOFError, OSError):
+                return
+            except Exception as e:
+                connection.send((False, RuntimeError(f"Unpicklable result: {e}")))
+
+
+def serve(
+    address: str,
+    batch_size: int = WRITER_BATCH_SIZE,
+    authkey: bytes | None = WRITER_AUTHKEY,
+) -> Listener:
+    """
+    Listen for writes on the Unix socket at address and commit them from a
+    writer thread. Returns the listener, closing it stops accepting workers.
+    """
+
+    global _serving, _pending
+
+    if authkey is None:
+        # Writes are unpickled, a worker has to prove it holds the key first.
+        raise ValueError("The writer needs an authkey")
+    _serving = True
+    engine = writer_engine()
+    pending = _pending = queue.Queue()
+    if os.path.exists(address):
+        os.unlink(address)
+    # Only the owner may connect, the socket is created with these
+    # permissions rather than changed after it is bound.
+    umask = os.umask(0o177)
+    try:
+        listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    finally:
+        os.umask(umask)
+
+    def accept():
+        while True:
+            try:
+                connection = listener.accept()
+            except OSError:
+                return
+            except Exception:
+                logger.exception("Accepting a worker failed")
+                continue
+            threading.Thread(
+                target=handle, args=(connection, pending), daemon=True
+            ).start()
+
+    threading.Thread(
+        target=write_loop, args=(engine, pending, batch_size), daemon=True
+    ).start()
+    threading.Thread(target=accept, daemon=True).start()
+    return listener
+
+
+async def run_until_exit(server: subprocess.Popen) -> int:
+    # Imported here, the app must see this process as the writer.
+    from . import replication, retention
+
+    tasks = []
+    if retention.is_enabled():
+        tasks.append(asyncio.create_task(retention.retention_loop(run=run_on_writer)))
+    engine = database.engine
+    if engine.dialect.name == "sqlite" and storage.SQLITE_MAINTENANCE_INTERVAL > 0:
+        tasks.append(
+            asyncio.create_task(storage.maintenance_loop(engine, run=run_on_writer))
+        )
+    if replication.replica_files() and replication.REPLICA_REFRESH_INTERVAL > 0:
+        tasks.append(asyncio.create_task(replication.refresh_loop(run=run_on_writer)))
+    try:
+        while server.poll() is None:
+            await asyncio.sleep(0.5)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return server.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--address",
+        default=WRITER_ADDRESS or os.path.join(tempfile.mkdtemp(), "writer.sock"),
+        help="Unix socket the writer listens on",
+    )
+    parser.add_argument("--batch-size", type=int, default=WRITER_BATCH_SIZE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    authkey = WRITER_AUTHKEY or os.urandom(32).hex().encode()
+    listener = serve(args.address, args.batch_size, authkey)
+    # The writer owns the schema, the workers cannot change it.
+    from .main import startup_event
+
+    startup_event()
+
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "workly.main:app",
+            "--host",
+            args.host,
+            "--port",
+            str(args.port),
+            "--workers",
+            str(args.workers),
+        ],
+        env={
+            **os.environ,
+            "WRITER_ADDRESS": args.address,
+            "WRITER_AUTHKEY": authkey.decode(),
+        },
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        sys.exit(asyncio.run(run_until_exit(server)))
+    finally:
+        if server.poll() is None:
+            server.terminate()
+            server.wait()
+        listener.close()
+
+
+if __name__ == "__main__":
+    # Run main() of the module the app imports rather than of this __main__
+    # copy, so both see this process as the writer.
+    from workly.writer import main
+
+    main()